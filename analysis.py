@@ -0,0 +1,105 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the analysis of finished games
+
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import heuristics
+import hex_AI
+from hex import Hex
+from search_stats import SearchStats
+
+# the analysis state of a worker process, set once when the pool starts
+_worker = dict()
+
+
+def _init_worker(n, starting_player, moves, node_value_heuristics, node_ordering_heuristic, max_depth, search):
+    """
+    Initializes a worker process with the game record and its own copy of the heuristics.
+    """
+    _worker.update(n=n, starting_player=starting_player, moves=moves, node_value_heuristics=node_value_heuristics,
+                   node_ordering_heuristic=node_ordering_heuristic, max_depth=max_depth, search=search)
+
+
+def _analyze_position(ply):
+    """
+    Rebuilds the position before the move ply of the game record and searches it with each value heuristic.
+
+    :param ply: the number of moves played
+    :return: the analysis of the position, a dict with the ply, the player in turn, the move played and,
+             for each heuristic, the minimax value, the best move, the search time and the visited nodes
+    """
+    game = Hex(_worker['n'], starting_player=_worker['starting_player'])
+    for move in _worker['moves'][:ply]:
+        game.play_move(move)
+    result = {'ply': ply, 'player': game.player_turn, 'played': _worker['moves'][ply], 'heuristics': dict()}
+    for name, node_value_heuristic in _worker['node_value_heuristics'].items():
+        stats = SearchStats()
+        stats.start_move(game)
+        start_time = time.time()
+        value, move = _worker['search'](game, game.player_turn == 1, max_depth=_worker['max_depth'],
+                                        node_value_heuristic=node_value_heuristic,
+                                        node_ordering_heuristic=_worker['node_ordering_heuristic'],
+                                        stats=stats)
+        result['heuristics'][name] = {'value': value, 'move': move, 'time': time.time() - start_time,
+                                      'nodes': stats.end_move(move)['nodes']}
+    return result
+
+
+def analyze_game(moves, n, node_value_heuristics, starting_player=1, max_depth=2,
+                 node_ordering_heuristic=None, search=hex_AI.alpha_beta_pruning, workers=4):
+    """
+    Analyzes a game record: the positions before each move are searched with each value heuristic
+    on a pool of processes. Each worker gets the record once and rebuilds its positions from the move prefixes.
+
+    :param moves: the moves of the game, like Hex.history
+    :param n: the dimension of the board
+    :param node_value_heuristics: a dict from the names to the ValueHeuristic objects to compare
+    :param starting_player: the player who made the first move
+    :param max_depth: the search depth
+    :param node_ordering_heuristic: the OrderHeuristic of the searches, None for RandomOrderHeuristic
+    :param search: the search function
+    :param workers: the number of worker processes, 1 to analyze in this process
+    :return: a generator of the analysis of each position (see _analyze_position), in the order of the game
+    """
+    if node_ordering_heuristic is None:
+        node_ordering_heuristic = heuristics.RandomOrderHeuristic()
+    initargs = (n, starting_player, list(moves), node_value_heuristics, node_ordering_heuristic, max_depth, search)
+    if workers == 1:
+        _init_worker(*initargs)
+        for ply in range(len(moves)):
+            yield _analyze_position(ply)
+        return
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    try:
+        # the results come in the order of the plies, each one as soon as it and the previous ones are ready
+        yield from executor.map(_analyze_position, range(len(moves)))
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+# ============================================== EXAMPLE =====================================================
+
+
+if __name__ == "__main__":
+    # a game of two random players, analyzed with two heuristics
+    import random
+    board_size = 7
+    game = Hex(board_size)
+    while game.check_game() is None:
+        game.play_move(random.choice(game.available_moves()))
+    for result in analyze_game(game.history, board_size,
+                               {'ShortestPath': heuristics.ShortestPathValueHeuristic(),
+                                'TwoDistance': heuristics.TwoDistanceValueHeuristic()},
+                               node_ordering_heuristic=heuristics.ChargeHeuristic(board_size)):
+        print(result['ply'], result['player'], result['played'],
+              {name: (round(analysis['value'], 3), analysis['move'], analysis['nodes'])
+               for name, analysis in result['heuristics'].items()})
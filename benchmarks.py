@@ -0,0 +1,620 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the benchmarks of the optimizations done on the game logic and on the search
+"""
+import math
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from tabulate import tabulate
+
+import hex_AI
+import heuristics
+import parallel_search
+from playouts import batch_playouts
+from hex import Hex
+from bitboard import BitboardHex
+from hsearch import HSearch
+from inferior import InferiorCells
+from opening_book import OpeningBook, build_book
+from resistance import ResistanceSolver
+from search_stats import SearchStats
+from transposition import TranspositionTable
+
+
+class CountingHex(Hex):
+    """
+    A Hex game which counts the search nodes, as every search node checks the game once.
+    """
+
+    def __init__(self, n, starting_player=1):
+        super().__init__(n, starting_player)
+        self.nodes = 0
+
+    def check_game(self):
+        self.nodes += 1
+        return super().check_game()
+
+
+def random_position(game_class, n, n_moves, seed=0):
+    """
+    :param game_class: Hex or one of its alternative implementations
+    :param n: the dimension of the board
+    :param n_moves: the number of random moves to play
+    :param seed: the random seed
+    :return: a game with n_moves random moves played and no winner yet
+    """
+    rng = random.Random(seed)
+    game = game_class(n)
+    while len(game.history) < n_moves:
+        game.play_move(rng.choice(game.available_moves()))
+        if game.check_game() is not None:
+            game.undo_move()
+    return game
+
+
+def traverse(game, depth):
+    """
+    Visits the full game tree until depth doing the board work of a search node:
+    the win check, the move generation and the play/undo of every move.
+
+    :param game: the game object
+    :param depth: the depth to visit until
+    :return: the number of visited nodes
+    """
+    nodes = 1
+    if game.check_game() is not None or depth == 0:
+        return nodes
+    for move in game.available_moves_view():
+        game.make_move(move)
+        nodes += traverse(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def solve(game, solved):
+    """
+    :param game: the game object
+    :param solved: the winners of the positions already solved, by zobrist key
+    :return: the winner of the position with perfect play
+    """
+    if game.zobrist_key not in solved:
+        winner = game.check_game()
+        if winner is None:
+            winner = -game.player_turn
+            for move in game.available_moves():
+                game.make_move(move)
+                move_winner = solve(game, solved)
+                game.unmake_move()
+                if move_winner == -winner:
+                    winner = move_winner
+                    break
+        solved[game.zobrist_key] = winner
+    return solved[game.zobrist_key]
+
+
+def board_throughput(sizes=(11, 13), depth=2, positions=5):
+    """
+    Compares the nodes per second of the list-of-lists grid and of the bitboard.
+
+    :param sizes: the board dimensions to test
+    :param depth: the traversal depth
+    :param positions: the number of random positions for each board size
+    """
+    table = []
+    for n in sizes:
+        row = [str(n) + 'x' + str(n)]
+        visited = []
+        for game_class in [Hex, BitboardHex]:
+            nodes = 0
+            start_time = time.time()
+            for seed in range(positions):
+                nodes += traverse(random_position(game_class, n, n * n // 3, seed), depth)
+            row.append(round(nodes / (time.time() - start_time)))
+            visited.append(nodes)
+        # the win checks stop the traversal at the same positions
+        assert visited[0] == visited[1], 'the bitboard visited different nodes'
+        row.append(round(row[2] / row[1], 2))
+        table.append(row)
+    print(tabulate(table, headers=['Board', 'Hex nodes/s', 'BitboardHex nodes/s', 'Speedup']), '\n')
+
+
+def search_node_counts(n=7, depth=3, positions=10):
+    """
+    Compares the nodes visited by alpha_beta_pruning and principal_variation_search on a fixed set of positions,
+    with the same move ordering for both.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    table = []
+    orderings = [('RandomOrderHeuristic', heuristics.RandomOrderHeuristic),
+                 ('ChargeHeuristic', lambda: heuristics.ChargeHeuristic(n)),
+                 ('KillerHistoryOrderHeuristic', lambda: heuristics.KillerHistoryOrderHeuristic(n)),
+                 ('KillerHistoryOrderHeuristic(ChargeHeuristic)',
+                  lambda: heuristics.KillerHistoryOrderHeuristic(n, heuristics.ChargeHeuristic(n))),
+                 ('KillerHistoryOrderHeuristic(ChargeHeuristic, base_first=True)',
+                  lambda: heuristics.KillerHistoryOrderHeuristic(n, heuristics.ChargeHeuristic(n), base_first=True))]
+    for ordering_name, ordering in orderings:
+        for use_table in [False, True]:
+            row = [ordering_name + (' + TT' if use_table else '')]
+            for search in [hex_AI.alpha_beta_pruning, hex_AI.principal_variation_search]:
+                nodes = 0
+                for seed in range(positions):
+                    game = random_position(CountingHex, n, n * n // 4, seed)
+                    game.nodes = 0
+                    # the same random ordering for both searches
+                    random.seed(seed)
+                    search(game, game.player_turn == 1, max_depth=depth,
+                           node_value_heuristic=heuristics.ShortestPathValueHeuristic(),
+                           node_ordering_heuristic=ordering(),
+                           transposition_table=TranspositionTable() if use_table else None)
+                    nodes += game.nodes
+                row.append(nodes)
+            row.append(round(row[2] / row[1], 3))
+            table.append(row)
+    print(tabulate(table, headers=['Ordering', 'alpha_beta_pruning nodes', 'principal_variation_search nodes', 'Ratio']), '\n')
+
+
+def parallel_speedup(n=9, depth=3, positions=3, workers=(1, 2, 4, 8)):
+    """
+    Measures the speedup of parallel_alpha_beta_pruning with respect to alpha_beta_pruning.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    :param workers: the numbers of worker processes to test
+    """
+    table = []
+    serial_time = None
+    for n_workers in workers:
+        value_heuristic = heuristics.ShortestPathValueHeuristic()
+        ordering = heuristics.KillerHistoryOrderHeuristic(n)
+        # the pool is started once, as search_move keeps it between the moves
+        pool = parallel_search.SearchPool(n_workers, hex_AI.alpha_beta_pruning, value_heuristic, ordering) \
+            if n_workers > 1 else None
+        start_time = time.time()
+        for seed in range(positions):
+            game = random_position(Hex, n, n * n // 4, seed)
+            ordering.new_search()
+            if n_workers == 1:
+                hex_AI.alpha_beta_pruning(game, game.player_turn == 1, max_depth=depth,
+                                          node_value_heuristic=value_heuristic, node_ordering_heuristic=ordering)
+            else:
+                parallel_search.parallel_alpha_beta_pruning(game, game.player_turn == 1, max_depth=depth,
+                                                            node_value_heuristic=value_heuristic,
+                                                            node_ordering_heuristic=ordering, pool=pool)
+        lasted_time = time.time() - start_time
+        if pool is not None:
+            pool.shutdown()
+        if serial_time is None:
+            serial_time = lasted_time
+        table.append([n_workers, round(lasted_time, 3), round(serial_time / lasted_time, 2)])
+    # the speedup is bounded by the processors of the machine
+    print('CPUs:', os.cpu_count())
+    print(tabulate(table, headers=['Workers', 'Time [s]', 'Speedup']), '\n')
+
+
+def playout_throughput(sizes=(7, 11, 13), k=1000):
+    """
+    Compares the playouts per second of a python loop on Hex and of the numpy batch playouts.
+
+    :param sizes: the board dimensions to test
+    :param k: the number of playouts
+    """
+    table = []
+    for n in sizes:
+        game = random_position(Hex, n, n * n // 4)
+        start_time = time.time()
+        for _ in range(k):
+            moves = game.available_moves()
+            random.shuffle(moves)
+            for move in moves:
+                game.make_move(move)
+            game.check_game()
+            for _ in moves:
+                game.unmake_move()
+        loop_rate = k / (time.time() - start_time)
+        start_time = time.time()
+        batch_playouts(game, k, np.random.default_rng(0))
+        batch_rate = k / (time.time() - start_time)
+        table.append([str(n) + 'x' + str(n), round(loop_rate), round(batch_rate), round(batch_rate / loop_rate, 2)])
+    print(tabulate(table, headers=['Board', 'Loop playouts/s', 'Batch playouts/s', 'Speedup']), '\n')
+
+
+def search_reuse(n=7, depth=3, moves=8, seed=0):
+    """
+    Compares the nodes visited by the searches of a game with a new transposition table
+    for each move and with the table kept between the moves.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param moves: the number of moves searched
+    :param seed: the random seed of the starting position
+    """
+    table = []
+    for reuse_search in [False, True]:
+        game = random_position(CountingHex, n, 2, seed)
+        config = {'board_size': n, 'max_depth': depth, 'reuse_search': reuse_search,
+                  'node_value_heuristic': heuristics.ShortestPathValueHeuristic(),
+                  'node_ordering_heuristic': heuristics.KillerHistoryOrderHeuristic(n),
+                  'aspiration_window': 1}
+        row = ['Kept table' if reuse_search else 'New table']
+        start_time = time.time()
+        for _ in range(moves):
+            game.nodes = 0
+            move = hex_AI.search_move(game, config)
+            row.append(game.nodes)
+            game.play_move(move)
+            if game.check_game() is not None:
+                break
+        row.append(round(time.time() - start_time, 3))
+        table.append(row)
+    print(tabulate(table, headers=['Search'] + ['Move ' + str(i) for i in range(len(table[0]) - 2)] + ['Time [s]']), '\n')
+
+
+def opening_book_lookups(n=5, depth=2, lookups=10000):
+    """
+    Builds the book of a small board in a temporary file, checks that it gives the book moves
+    in the games started by both the players and measures the lookups per second.
+
+    :param n: the dimension of the board
+    :param depth: the search depth of the book moves
+    :param lookups: the number of timed lookups
+    """
+    config = {'board_size': n, 'max_depth': depth, 'node_value_heuristic': heuristics.ShortestPathValueHeuristic(),
+              'node_ordering_heuristic': heuristics.ChargeHeuristic(n)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hex' + str(n) + '.book')
+        positions = build_book(path, config, verbose=False)
+        book = OpeningBook(path)
+        # the positions searched by the builder, in the games started by the first player, and their
+        # transpositions in the games started by the second one, which must give the transposed moves
+        games = []
+        for history in [[]] + [[(r, c)] for r in range(n) for c in range(n)]:
+            game, transposed_game = Hex(n), Hex(n, starting_player=-1)
+            for r, c in history:
+                game.play_move((r, c))
+                transposed_game.play_move((c, r))
+            move = book.lookup(game)
+            assert move is not None and game.grid[move[0]][move[1]] == 0, 'the book has no move for ' + str(history)
+            assert book.lookup(transposed_game) == (move[1], move[0]), 'the book is not symmetric'
+            games += [game, transposed_game]
+        start_time = time.time()
+        for i in range(lookups):
+            book.lookup(games[i % len(games)])
+        lasted_time = time.time() - start_time
+        book.close()
+    print(tabulate([[positions, round(lookups / lasted_time)]], headers=['Book positions', 'Lookups/s']), '\n')
+
+
+def virtual_connection_pruning(n=7, depth=3, positions=10):
+    """
+    Compares the nodes visited by alpha_beta_pruning with and without the virtual connections (H-search)
+    on tactical positions: half filled boards, where the bridges and the edge templates often decide the game.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    # along random games on a small board with take backs, the connections kept by one H-search give the true
+    # winners and must-play cells, found by solving the positions: each opening is played by both players in turn,
+    # so the same moves are analyzed with different colors
+    hsearch = HSearch(4)
+    solved = dict()
+    for seed in range(positions * 10):
+        rng = random.Random(seed // 2)
+        game = Hex(4, starting_player=1 if seed % 2 == 0 else -1)
+        for _ in range(4):
+            game.play_move(rng.choice(game.available_moves()))
+        rng = random.Random(seed)
+        while game.check_game() is None:
+            proven_winner, must_play = hsearch.analyze(game)
+            assert proven_winner is None or proven_winner == solve(game, solved)
+            for move in game.available_moves():
+                if must_play is not None and not must_play >> (move[0] * 4 + move[1]) & 1:
+                    game.make_move(move)
+                    assert solve(game, solved) == game.player_turn
+                    game.unmake_move()
+            if len(game.history) > 4 and rng.random() < 0.2:
+                game.undo_move()
+            else:
+                game.play_move(rng.choice(game.available_moves()))
+    table = []
+    for use_hsearch in [False, True]:
+        nodes, proven = 0, 0
+        start_time = time.time()
+        for seed in range(positions):
+            game = random_position(CountingHex, n, n * n // 2, seed)
+            game.nodes = 0
+            value, _ = hex_AI.alpha_beta_pruning(game, game.player_turn == 1, max_depth=depth,
+                                                 node_value_heuristic=heuristics.ShortestPathValueHeuristic(),
+                                                 node_ordering_heuristic=heuristics.ChargeHeuristic(n),
+                                                 virtual_connections=HSearch(n) if use_hsearch else None)
+            nodes += game.nodes
+            proven += value in (float('inf'), -float('inf'))
+        table.append(['H-search' if use_hsearch else 'No H-search', nodes, proven, round(time.time() - start_time, 3)])
+    print(tabulate(table, headers=['Search', 'Nodes', 'Proven positions', 'Time [s]']), '\n')
+
+
+def inferior_cell_pruning(n=7, depth=3, positions=10):
+    """
+    Compares the nodes visited by alpha_beta_pruning with and without skipping the dead and captured cells,
+    on half filled boards.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    table = []
+    for use_inferior in [False, True]:
+        nodes, pruned = 0, 0
+        start_time = time.time()
+        for seed in range(positions):
+            game = random_position(CountingHex, n, n * n // 2, seed)
+            inferior_cells = InferiorCells(n)
+            pruned += bin(inferior_cells.analyze(game)[1]).count('1')
+            game.nodes = 0
+            hex_AI.alpha_beta_pruning(game, game.player_turn == 1, max_depth=depth,
+                                      node_value_heuristic=heuristics.ShortestPathValueHeuristic(),
+                                      node_ordering_heuristic=heuristics.ChargeHeuristic(n),
+                                      inferior_cells=inferior_cells if use_inferior else None)
+            nodes += game.nodes
+        table.append(['Inferior cells' if use_inferior else 'All cells', nodes,
+                      round(pruned / positions, 2) if use_inferior else 0, round(time.time() - start_time, 3)])
+    print(tabulate(table, headers=['Moves', 'Nodes', 'Inferior root cells', 'Time [s]']), '\n')
+
+
+def iterative_search_speed(n=7, depth=3, positions=5):
+    """
+    Compares the nodes per second of the recursive and of the iterative alpha_beta_pruning, which visit the same nodes,
+    with a cheap (ConnectedValueHeuristic) and an expensive (ShortestPathValueHeuristic) node value heuristic.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    # with the same position, ordering (the random one is seeded again for each search) and depth
+    # the two searches find the same value and move visiting the same nodes
+    orderings = [lambda: heuristics.RandomOrderHeuristic(), lambda: heuristics.ChargeHeuristic(n),
+                 lambda: heuristics.KillerHistoryOrderHeuristic(n),
+                 lambda: heuristics.KillerHistoryOrderHeuristic(n, heuristics.ChargeHeuristic(n))]
+    for seed in range(positions):
+        for ordering in orderings:
+            for max_depth in range(1, depth + 1):
+                results = []
+                for search in [hex_AI.alpha_beta_pruning, hex_AI.iterative_alpha_beta_pruning]:
+                    game = random_position(CountingHex, n, n * n // 4, seed)
+                    game.nodes = 0
+                    random.seed(seed)
+                    value, move = search(game, game.player_turn == 1, max_depth=max_depth,
+                                         node_value_heuristic=heuristics.ShortestPathValueHeuristic(),
+                                         node_ordering_heuristic=ordering())
+                    results.append((value, move, game.nodes))
+                assert results[0] == results[1], 'the iterative search found a different result'
+    table = []
+    for heuristic in [heuristics.ConnectedValueHeuristic, heuristics.ShortestPathValueHeuristic]:
+        row = [heuristic.__name__]
+        for search in [hex_AI.alpha_beta_pruning, hex_AI.iterative_alpha_beta_pruning]:
+            nodes = 0
+            start_time = time.time()
+            for seed in range(positions):
+                game = random_position(CountingHex, n, n * n // 4, seed)
+                game.nodes = 0
+                search(game, game.player_turn == 1, max_depth=depth, node_value_heuristic=heuristic(),
+                       node_ordering_heuristic=heuristics.KillerHistoryOrderHeuristic(n))
+                nodes += game.nodes
+            row.append(round(nodes / (time.time() - start_time)))
+        row.append(round(row[2] / row[1], 2))
+        table.append(row)
+    print(tabulate(table, headers=['Value heuristic', 'alpha_beta_pruning nodes/s',
+                                   'iterative_alpha_beta_pruning nodes/s', 'Speedup']), '\n')
+
+
+def value_cache(n=7, depth=2, moves=6, seed=0):
+    """
+    Compares the evaluation time of the searches of a game with the value heuristic and with the cached one,
+    the table is kept between the moves.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param moves: the number of moves searched
+    :param seed: the random seed of the starting position
+    """
+    table = []
+    for cached in [False, True]:
+        game = random_position(Hex, n, 2, seed)
+        node_value_heuristic = heuristics.MaxFlowValueHeuristic()
+        if cached:
+            node_value_heuristic = heuristics.CachedValueHeuristic(node_value_heuristic)
+        stats = SearchStats()
+        config = {'board_size': n, 'max_depth': depth, 'reuse_search': True, 'search_stats': stats,
+                  'node_value_heuristic': node_value_heuristic,
+                  'node_ordering_heuristic': heuristics.KillerHistoryOrderHeuristic(n)}
+        start_time = time.time()
+        for _ in range(moves):
+            game.play_move(hex_AI.search_move(game, config))
+            # the value shown by the ui after each move
+            node_value_heuristic.compute(game)
+            if game.check_game() is not None:
+                break
+        table.append(['Cached' if cached else 'Not cached', sum(record['evaluations'] for record in stats.moves),
+                      round(sum(record['evaluation_time'] for record in stats.moves), 3),
+                      round(node_value_heuristic.hit_rate(), 3) if cached else '-',
+                      round(time.time() - start_time, 3)])
+    print(tabulate(table, headers=['Value heuristic', 'Evaluations', 'Evaluation time [s]', 'Hit rate',
+                                   'Time [s]']), '\n')
+
+
+def incremental_shortest_path(sizes=(7, 11), depth=3, positions=3):
+    """
+    Compares the searches with ShortestPathValueHeuristic and with IncrementalShortestPathValueHeuristic,
+    which must find the same values and moves.
+
+    :param sizes: the dimensions of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    # along random games, started by both players and with take backs, one incremental heuristic gives the values
+    # computed from scratch (nan when both the players are disconnected, at the end of the game)
+    heuristic, incremental_heuristic = heuristics.ShortestPathValueHeuristic(), \
+        heuristics.IncrementalShortestPathValueHeuristic()
+    for seed in range(positions * 100):
+        rng = random.Random(seed)
+        game = Hex(rng.randint(1, max(sizes)), starting_player=rng.choice([1, -1]))
+        for _ in range(3 * game.n * game.n):
+            value, incremental_value = heuristic.compute(game), incremental_heuristic.compute(game)
+            assert value == incremental_value or math.isnan(value) and math.isnan(incremental_value), \
+                'the incremental heuristic found a different value'
+            if game.history and (game.check_game() is not None or rng.random() < 0.3):
+                game.undo_move()
+            else:
+                game.play_move(rng.choice(game.available_moves()))
+    table = []
+    for n in sizes:
+        row = [n]
+        results = []
+        for heuristic in [heuristics.ShortestPathValueHeuristic(), heuristics.IncrementalShortestPathValueHeuristic()]:
+            result = []
+            start_time = time.time()
+            for seed in range(positions):
+                game = random_position(Hex, n, n * n // 4, seed)
+                result.append(hex_AI.alpha_beta_pruning(game, game.player_turn == 1, max_depth=depth,
+                                                        node_value_heuristic=heuristic,
+                                                        node_ordering_heuristic=heuristics.KillerHistoryOrderHeuristic(n)))
+            row.append(round(time.time() - start_time, 3))
+            results.append(result)
+        assert results[0] == results[1], 'the incremental heuristic found different values'
+        row.append(round(row[1] / row[2], 2))
+        table.append(row)
+    print(tabulate(table, headers=['Board', 'ShortestPathValueHeuristic [s]',
+                                   'IncrementalShortestPathValueHeuristic [s]', 'Speedup']), '\n')
+
+
+def two_distance_timings(sizes=(7, 9, 11, 13, 15, 17, 19), positions=20):
+    """
+    Compares the time per call of TwoDistanceValueHeuristic and of ArrayTwoDistanceValueHeuristic
+    (also with the potentials of both the edges) on random positions, where they must give the same values.
+
+    :param sizes: the dimensions of the board
+    :param positions: the number of random positions of each dimension
+    """
+    table = []
+    heuristic, array_heuristic = heuristics.TwoDistanceValueHeuristic(), heuristics.ArrayTwoDistanceValueHeuristic()
+    for n in sizes:
+        games = [random_position(Hex, n, n * n // 4, seed) for seed in range(positions)]
+        row = [n]
+        values = []
+        for compute in [heuristic.compute, array_heuristic.compute, lambda game: array_heuristic.potentials(game)[0]]:
+            start_time = time.perf_counter()
+            values.append([compute(game) for game in games])
+            row.append(round((time.perf_counter() - start_time) / positions * 1000, 3))
+        assert values[0] == values[1] == values[2], 'the array two distance found different values'
+        table.append(row)
+    print(tabulate(table, headers=['Board', 'TwoDistanceValueHeuristic [ms]', 'ArrayTwoDistanceValueHeuristic [ms]',
+                                   'With the potentials [ms]']), '\n')
+
+
+def resistance_backends(sizes=(5, 7, 8, 11), positions=5):
+    """
+    Compares the time per call of ResistanceValueHeuristic (PySpice and ngspice) and of
+    SparseResistanceValueHeuristic (scipy) on random positions, where they must give the same values.
+    Without the ngspice library only the sparse backend is timed.
+
+    :param sizes: the dimensions of the board
+    :param positions: the number of random positions of each dimension
+    """
+    table = []
+    spice = True
+    for n in sizes:
+        games = [random_position(Hex, n, n * n // 4, seed) for seed in range(positions)]
+        # a new solver for each size, so that no value comes from its cache
+        start_time = time.perf_counter()
+        values = [heuristics.SparseResistanceValueHeuristic().compute(game) for game in games]
+        sparse_time = (time.perf_counter() - start_time) / positions * 1000
+        row = [n, '-', round(sparse_time, 3), '-']
+        if spice:
+            try:
+                start_time = time.perf_counter()
+                spice_values = [heuristics.ResistanceValueHeuristic().compute(game) for game in games]
+                spice_time = (time.perf_counter() - start_time) / positions * 1000
+            except OSError:
+                # the ngspice shared library is not installed
+                spice = False
+        if not spice:
+            table.append(row)
+            continue
+        # ngspice does not take 0 ohm resistors as ideal wires, so the values are close but not equal
+        for value, spice_value in zip(values, spice_values):
+            assert value == spice_value or math.isclose(value, spice_value, rel_tol=1e-2, abs_tol=1e-2), \
+                'the sparse resistance found different values'
+        row[1], row[3] = round(spice_time, 3), round(spice_time / sparse_time, 1)
+        table.append(row)
+    print(tabulate(table, headers=['Board', 'ResistanceValueHeuristic [ms]', 'SparseResistanceValueHeuristic [ms]',
+                                   'Speedup']), '\n')
+
+
+def current_flow_ordering(n=7, depth=3, positions=5):
+    """
+    Compares the nodes visited by alpha_beta_pruning with SparseResistanceValueHeuristic and different move
+    orderings, and the networks solved when CurrentFlowOrderHeuristic has its own solver or shares the one
+    of the value heuristic.
+
+    :param n: the dimension of the board
+    :param depth: the search depth
+    :param positions: the number of random positions
+    """
+    table = []
+    orderings = [('RandomOrderHeuristic', lambda solver: heuristics.RandomOrderHeuristic()),
+                 ('ChargeHeuristic', lambda solver: heuristics.ChargeHeuristic(n)),
+                 ('CurrentFlowOrderHeuristic', lambda solver: heuristics.CurrentFlowOrderHeuristic()),
+                 ('CurrentFlowOrderHeuristic (shared solver)', heuristics.CurrentFlowOrderHeuristic)]
+    for ordering_name, ordering in orderings:
+        nodes = 0
+        solves = 0
+        start_time = time.time()
+        for seed in range(positions):
+            game = random_position(CountingHex, n, n * n // 4, seed)
+            game.nodes = 0
+            random.seed(seed)
+            solver = ResistanceSolver()
+            node_ordering_heuristic = ordering(solver)
+            hex_AI.iterative_deepening(game, game.player_turn == 1, max_depth=depth,
+                                       node_value_heuristic=heuristics.SparseResistanceValueHeuristic(solver),
+                                       node_ordering_heuristic=node_ordering_heuristic)
+            nodes += game.nodes
+            solves += solver.misses
+            if isinstance(node_ordering_heuristic, heuristics.CurrentFlowOrderHeuristic) and \
+                    node_ordering_heuristic.solver is not solver:
+                solves += node_ordering_heuristic.solver.misses
+        table.append([ordering_name, nodes, solves, round(time.time() - start_time, 3)])
+    print(tabulate(table, headers=['Ordering', 'Nodes', 'Networks solved', 'Time [s]']), '\n')
+
+
+# ============================================== BENCHMARKS ==================================================
+
+
+if __name__ == "__main__":
+    board_throughput()
+    search_node_counts()
+    parallel_speedup()
+    playout_throughput()
+    search_reuse()
+    opening_book_lookups()
+    virtual_connection_pruning()
+    inferior_cell_pruning()
+    iterative_search_speed()
+    value_cache()
+    incremental_shortest_path()
+    two_distance_timings()
+    resistance_backends()
+    current_flow_ordering()
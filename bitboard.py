@@ -0,0 +1,267 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains a bitboard implementation of the game logic
+
+"""
+from hex import Hex, zobrist_tables
+
+
+class BitboardHex:
+    """
+    A class which realizes the Hex game logic storing the stones of each player as an integer bitmask,
+    where the cell (r, c) is the bit r * n + c.
+    It has the same interface of Hex, so it can be used by the game search and the heuristics.
+    """
+
+    def __init__(self, n, starting_player=1):
+        """
+        Initializes a new game.
+
+        :param n: the dimension of the board
+        :param starting_player: 1 or -1
+        """
+        # the dimension of the grid
+        self.n = n
+        # the grid, kept in sync with the bitmasks for the heuristics which read the cells
+        self.grid = [[0] * n for _ in range(n)]
+        # a history of the game.
+        self.history = []
+        # the player turn
+        self.player_turn = starting_player
+        # the Zobrist key of the position, side to move included (player -1 to move)
+        self._zobrist = zobrist_tables(n)
+        self.zobrist_key = self._zobrist['side'] if starting_player == -1 else 0
+        # the stones of each player
+        self.stones = {1: 0, -1: 0}
+        # the mask of all the cells
+        self.full_mask = (1 << (n * n)) - 1
+        # the edges of the players: player 1 connects the left and right edges, player -1 the top and bottom ones
+        left = right = top = bottom = 0
+        for i in range(n):
+            left |= 1 << (i * n)
+            right |= 1 << (i * n + n - 1)
+            top |= 1 << i
+            bottom |= 1 << ((n - 1) * n + i)
+        self.edges = {1: (left, right), -1: (top, bottom)}
+        # for each of the six hex directions, the bit shift and the mask of the cells
+        # that have an adjacent cell in that direction
+        self.shifts = []
+        for dr, dc in [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]:
+            mask = 0
+            for r in range(n):
+                for c in range(n):
+                    if 0 <= r + dr < n and 0 <= c + dc < n:
+                        mask |= 1 << (r * n + c)
+            self.shifts.append((dr * n + dc, mask))
+        # the adjacent cells of each cell
+        self.adjacent = []
+        for r in range(n):
+            for c in range(n):
+                adjacent = 0
+                for dr, dc in [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]:
+                    if self._is_move_in_grid(r + dr, c + dc):
+                        adjacent |= 1 << ((r + dr) * n + c + dc)
+                self.adjacent.append(adjacent)
+        # the win check is incremental: for each player the stones connected to each of its edges,
+        # which grow with the stones played next to them, and the winner
+        self.reached = {1: (0, 0), -1: (0, 0)}
+        self.winner = None
+        # for each played move the reached stones of the player and the winner before it
+        self._reached_history = []
+
+    def check_game(self):
+        """
+        :return: 1 if 1 wins, -1 if -1 wins, None if the game is not finished yet.
+        """
+        return self.winner
+
+    def _is_move_in_grid(self, r, c):
+        """
+        :param r: a row value
+        :param c: a column value
+        :return: True if the move is in the grid else False
+        """
+        return 0 <= r < self.n and 0 <= c < self.n
+
+    def play_move(self, move):
+        """
+        Plays the specified move (r, c) for current turn player, if valid
+
+        :param move: a tuple of integers (r, c)
+        :return: False if game already ended or move is not valid, else True
+        """
+        # game is ended (someone won)
+        if self.check_game() is not None:
+            return False
+        # if move is valid
+        r, c = move
+        if self._is_move_in_grid(r, c) and self.grid[r][c] == 0:
+            self.make_move((r, c))
+            return True
+        else:
+            return False
+
+    def undo_move(self):
+        """
+        Undo the last move.
+        """
+        self.unmake_move()
+
+    def make_move(self, move):
+        """
+        Plays the specified move (r, c) for current turn player without any validity check.
+
+        :param move: a tuple of integers (r, c)
+        """
+        r, c = move
+        player = self.player_turn
+        cell = r * self.n + c
+        bit = 1 << cell
+        self.grid[r][c] = player
+        stones = self.stones[player] = self.stones[player] | bit
+        self.history.append(move)
+        self.player_turn = -player
+        self.zobrist_key ^= self._zobrist[player][cell] ^ self._zobrist['side']
+        # the stone joins the stones connected to an edge if it touches the edge or them, bringing its group
+        reached = self.reached[player]
+        self._reached_history.append((reached, self.winner))
+        start_reached, end_reached = reached
+        start_edge, end_edge = self.edges[player]
+        adjacent = self.adjacent[cell]
+        if bit & start_edge or adjacent & start_reached:
+            start_reached |= self._group(bit, adjacent, stones & ~start_reached)
+        if bit & end_edge or adjacent & end_reached:
+            end_reached |= self._group(bit, adjacent, stones & ~end_reached)
+        self.reached[player] = start_reached, end_reached
+        if start_reached & end_reached:
+            self.winner = player
+
+    def unmake_move(self):
+        """
+        Undo the last move played with make_move (or play_move).
+        """
+        self.player_turn *= -1
+        r, c = self.history.pop()
+        self.grid[r][c] = 0
+        self.stones[self.player_turn] &= ~(1 << (r * self.n + c))
+        self.zobrist_key ^= self._zobrist[self.player_turn][r * self.n + c] ^ self._zobrist['side']
+        self.reached[self.player_turn], self.winner = self._reached_history.pop()
+
+    def _group(self, bit, adjacent, stones):
+        """
+        :param bit: the bit of a stone
+        :param adjacent: the adjacent cells of the stone
+        :param stones: the stones the group can grow on, the stone included
+        :return: the group of the stone within stones
+        """
+        # the stone is often alone, or joined only to the stones next to it
+        group = bit | (adjacent & stones)
+        if group == bit:
+            return group
+        # bit-parallel flood fill
+        while True:
+            grown = group
+            for shift, mask in self.shifts:
+                if shift > 0:
+                    grown |= (group & mask) << shift
+                else:
+                    grown |= (group & mask) >> -shift
+            grown &= stones
+            if grown == group:
+                return group
+            group = grown
+
+    def _has_connection(self, player):
+        """
+        Checks the connection from scratch, without using the reached stones.
+
+        :param player: 1 or -1
+        :return: True if there is a connection between edges of player
+        """
+        stones = self.stones[player]
+        start_edge, end_edge = self.edges[player]
+        # no stone on one of the edges, no connection
+        if not stones & end_edge:
+            return False
+        # bit-parallel flood fill from the stones on the first edge
+        reached = stones & start_edge
+        while reached:
+            if reached & end_edge:
+                return True
+            frontier = reached
+            for shift, mask in self.shifts:
+                if shift > 0:
+                    frontier |= (reached & mask) << shift
+                else:
+                    frontier |= (reached & mask) >> -shift
+            frontier &= stones
+            # the fill can't grow anymore
+            if frontier == reached:
+                return False
+            reached = frontier
+        return False
+
+    def available_moves(self):
+        """
+        :return: a list of all remaining valid moves.
+        """
+        moves = []
+        empty = self.full_mask & ~(self.stones[1] | self.stones[-1])
+        while empty:
+            # extracts the lowest empty cell
+            cell = (empty & -empty).bit_length() - 1
+            empty &= empty - 1
+            moves.append(divmod(cell, self.n))
+        return moves
+
+    def available_moves_view(self):
+        """
+        :return: the list of all remaining valid moves, not to be modified.
+        """
+        return self.available_moves()
+
+    def num_available_moves(self):
+        """
+        :return: the number of remaining valid moves.
+        """
+        return bin(self.full_mask & ~(self.stones[1] | self.stones[-1])).count('1')
+
+    def draw_board_tty(self):
+        """
+        Draws the board on the terminal.
+        """
+        Hex.draw_board_tty(self)
+
+
+# TEST
+
+
+if __name__ == "__main__":
+    hex = BitboardHex(5, starting_player=1)
+    hex.play_move((2, 3))
+    hex.draw_board_tty()
+    hex.play_move((1, 2))
+    hex.draw_board_tty()
+    hex.play_move((1, 4))
+    hex.draw_board_tty()
+    hex.play_move((1, 2))
+    hex.draw_board_tty()
+    hex.undo_move()
+    hex.draw_board_tty()
+    hex.play_move((2, 4))
+    hex.draw_board_tty()
+    hex.play_move((2, 2))
+    hex.play_move((3, 4))
+    hex.play_move((0, 2))
+    hex.play_move((1, 3))
+    hex.play_move((3, 2))
+    hex.play_move((2, 1))
+    hex.play_move((4, 2))
+    hex.draw_board_tty()
+    print(hex.check_game())
@@ -0,0 +1,291 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the engine process speaking a text protocol (GTP style)
+
+"""
+import math
+import string
+import sys
+import time
+
+import heuristics
+import hex_AI
+from hex import Hex
+from hsearch import HSearch
+from inferior import InferiorCells
+from opening_book import OpeningBook, book_path
+from search_stats import SearchStats
+
+# the names of the two players, player 1 (blue) connects left and right, player -1 (red) top and bottom
+COLORS = {'blue': 1, 'b': 1, '1': 1, 'red': -1, 'r': -1, '-1': -1}
+# the cells drawn by showboard
+STONES = {0: '.', 1: 'B', -1: 'R'}
+
+
+def new_config(board_size):
+    """
+    :param board_size: the dimension of the board
+    :return: the default config of the engine, with the heuristics and the tables of the board dimension
+    """
+    return {
+        'board_size': board_size,
+        'max_depth': 4,
+        'move_time': 10,
+        'node_value_heuristic': heuristics.TwoDistanceValueHeuristic(),
+        'node_ordering_heuristic': heuristics.KillerHistoryOrderHeuristic(board_size,
+                                                                          heuristics.ChargeHeuristic(board_size)),
+        'opening_book': OpeningBook(book_path(board_size)),
+        'virtual_connections': HSearch(board_size),
+        'inferior_cells': InferiorCells(board_size)
+    }
+
+
+def format_move(move):
+    """
+    :param move: a tuple of integers (r, c)
+    :return: the move as column letter and row number, like 'c2' for (1, 2)
+    """
+    return string.ascii_lowercase[move[1]] + str(move[0] + 1)
+
+
+def parse_move(text, n):
+    """
+    :param text: a move as column letter and row number, like 'c2'
+    :param n: the dimension of the board
+    :return: the tuple of integers (r, c)
+    """
+    text = text.lower()
+    if len(text) < 2 or text[0] not in string.ascii_lowercase[:n] or not text[1:].isdigit() \
+            or not 1 <= int(text[1:]) <= n:
+        raise ValueError('invalid move ' + text)
+    return int(text[1:]) - 1, string.ascii_lowercase.index(text[0])
+
+
+class GTPEngine:
+    """
+    A long lived engine reading one command per line and writing the replies, in the style of the
+    Go Text Protocol: a reply is '= result' or '? error' (with the id of the command, if given)
+    followed by an empty line. The game, the heuristics with their state and the search tables are
+    kept between the commands, so the startup is paid once.
+
+    The commands are:
+     - name, version, protocol_version, list_commands, quit;
+     - boardsize n: starts a new game on a board of dimension n, clear_board: starts a new game;
+     - play color move: plays the move (like 'c2') of color (blue or red), which must be in turn;
+     - genmove color [seconds]: searches, plays and replies the move of color, within seconds
+       (else within the time_settings);
+     - time_settings move_time [game_time]: the seconds per move and per game of the computer, 0 for no limit;
+     - undo: takes back the last move;
+     - analyze color [seconds]: searches the position without playing, writing a line per completed depth
+       ('depth d value v move m nodes k time t') as soon as it is found, then 'bestmove m';
+     - showboard: draws the board in plain text ('.' for an empty cell, 'B' for blue and 'R' for red).
+    """
+
+    def __init__(self, board_size=11, config=None, starting_player=1):
+        """
+        :param board_size: the dimension of the board
+        :param config: the game config of the searches, if None the default one of the board dimension
+        :param starting_player: the player making the first move of each game
+        """
+        self.config = config if config is not None else new_config(board_size)
+        self.starting_player = starting_player
+        self.game = self.config.get('game_class', Hex)(self.config['board_size'], starting_player=starting_player)
+        self.output = sys.stdout
+        self.running = True
+        self.commands = {
+            'name': self.name,
+            'version': self.version,
+            'protocol_version': self.protocol_version,
+            'list_commands': self.list_commands,
+            'quit': self.quit,
+            'boardsize': self.boardsize,
+            'clear_board': self.clear_board,
+            'play': self.play,
+            'genmove': self.genmove,
+            'time_settings': self.time_settings,
+            'undo': self.undo,
+            'analyze': self.analyze,
+            'showboard': self.showboard
+        }
+
+    def run(self, input=sys.stdin, output=sys.stdout):
+        """
+        Answers the commands of input on output, until quit or the end of input.
+        """
+        self.output = output
+        for line in input:
+            self.handle(line)
+            if not self.running:
+                break
+
+    def handle(self, line):
+        """
+        Executes a command line and writes its reply.
+
+        :param line: the command line, optionally starting with a numeric id
+        """
+        # the comments and the empty lines are ignored
+        words = line.split('#')[0].split()
+        if not words:
+            return
+        command_id = ''
+        if words[0].isdigit():
+            command_id = words.pop(0)
+            if not words:
+                return
+        command = self.commands.get(words[0].lower())
+        if command is None:
+            self._reply('?' + command_id, 'unknown command')
+            return
+        try:
+            result = command(command_id, *words[1:])
+        except Exception as error:
+            # the engine keeps running after any failed command
+            self._reply('?' + command_id, str(error) or type(error).__name__)
+            return
+        # the streaming commands write their reply themselves
+        if result is not None:
+            self._reply('=' + command_id, result)
+
+    def _reply(self, status, result):
+        """
+        Writes a reply, the result lines can't be empty because an empty line ends the reply.
+        """
+        lines = [line for line in str(result).split('\n') if line.strip()]
+        self.output.write(status + (' ' + '\n'.join(lines) if lines else '') + '\n\n')
+        self.output.flush()
+
+    def _player(self, color):
+        """
+        :param color: the name of a player
+        :return: 1 or -1
+        """
+        if color.lower() not in COLORS:
+            raise ValueError('invalid color ' + color)
+        player = COLORS[color.lower()]
+        if player != self.game.player_turn:
+            raise ValueError('not the turn of ' + color)
+        if self.game.check_game() is not None:
+            raise ValueError('the game is over')
+        return player
+
+    # ============================================== COMMANDS ================================================
+
+    def name(self, command_id):
+        return 'AI_plays_Hex'
+
+    def version(self, command_id):
+        return '1.0'
+
+    def protocol_version(self, command_id):
+        return '2'
+
+    def list_commands(self, command_id):
+        return '\n'.join(self.commands)
+
+    def quit(self, command_id):
+        self.running = False
+        return ''
+
+    def boardsize(self, command_id, size):
+        """
+        Starts a new game on a board of dimension size, the heuristics and the tables are rebuilt
+        only if the dimension changes.
+        """
+        size = int(size)
+        if not 1 <= size <= len(string.ascii_lowercase):
+            raise ValueError('unacceptable size')
+        if size != self.config['board_size']:
+            self.config = new_config(size)
+        return self.clear_board(command_id)
+
+    def clear_board(self, command_id):
+        self.game = self.config.get('game_class', Hex)(self.config['board_size'], starting_player=self.starting_player)
+        return ''
+
+    def play(self, command_id, color, move):
+        self._player(color)
+        if not self.game.play_move(parse_move(move, self.game.n)):
+            raise ValueError('illegal move ' + move)
+        return ''
+
+    def genmove(self, command_id, color, seconds=None):
+        self._player(color)
+        # the move time is added to the game clock also when the seconds are given
+        move = hex_AI.best_move(self.game, self.config, float(seconds) if seconds is not None else None)
+        self.game.play_move(move)
+        return format_move(move)
+
+    def time_settings(self, command_id, move_time, game_time=0):
+        self.config['move_time'] = float(move_time) if float(move_time) > 0 else None
+        self.config['game_time'] = float(game_time) if float(game_time) > 0 else None
+        return ''
+
+    def undo(self, command_id):
+        if not self.game.history:
+            raise ValueError('cannot undo')
+        self.game.undo_move()
+        return ''
+
+    def analyze(self, command_id, color, seconds=None):
+        """
+        Searches the current position with iterative deepening, writing the result of each depth
+        as soon as it is completed. The reply is written here, so it is not returned.
+        """
+        self._player(color)
+        # the arguments are checked before the reply starts, so their errors get a ? reply
+        time_budget = float(seconds) if seconds is not None else None
+        if time_budget is not None and not time_budget > 0:
+            raise ValueError('invalid seconds ' + seconds)
+        # the reply starts before the search, its lines are the completed depths
+        self.output.write('=' + command_id + '\n')
+        self.output.flush()
+        stats = SearchStats()
+        stats.start_move(self.game)
+        start_time = time.time()
+
+        def write_depth(value, move, depth):
+            self.output.write('depth {} value {} move {} nodes {} time {:.3f}\n'.format(
+                depth, value if math.isinf(value) else round(value, 4), format_move(move),
+                sum(stats.nodes), time.time() - start_time))
+            self.output.flush()
+
+        # the statistics of this search only, the ones of the config are kept for the played moves
+        config = dict(self.config, search_stats=stats)
+        try:
+            move = hex_AI.search_move(self.game, config, time_budget, callback=write_depth)
+            self.output.write('bestmove ' + format_move(move) + '\n')
+        except Exception as error:
+            # the reply is already open, so the failure is its last line instead of a ? reply
+            self.output.write('error ' + ' '.join((str(error) or type(error).__name__).split()) + '\n')
+        finally:
+            # the persistent table and pool are made by search_move on the copy of the config
+            for key in hex_AI.SEARCH_STATE_KEYS:
+                if key in config:
+                    self.config[key] = config[key]
+            self.output.write('\n')
+            self.output.flush()
+
+    def showboard(self, command_id):
+        """
+        Draws the board with the column letters and the row numbers of the moves, each row shifted
+        by one more space like the hexagonal grid.
+        """
+        lines = ['   ' + ' '.join(string.ascii_lowercase[:self.game.n])]
+        for r, row in enumerate(self.game.grid):
+            lines.append(' ' * r + '{:>2} '.format(r + 1) + ' '.join(STONES[cell] for cell in row))
+        return '\n'.join(lines)
+
+
+# ============================================== ENGINE ======================================================
+
+
+if __name__ == "__main__":
+    # usage: python gtp.py [board_size], then the commands on stdin
+    GTPEngine(int(sys.argv[1]) if len(sys.argv) > 1 else 11).run()
@@ -12,11 +12,17 @@ FILE: this file contains all the heuristic classes I used in the game search
 import itertools
 import math
 import random
+import threading
 import time
+from collections import OrderedDict
 from copy import deepcopy
-from heapq import heappush, heappop
+from heapq import heapify, heappush, heappop
 import networkx as nx
+import numpy as np
+from scipy import ndimage
 from hex import Hex
+from playouts import batch_playouts
+from resistance import ResistanceSolver, topology as resistance_topology
 import PySpice.Logging.Logging as Logging
 logger = Logging.setup_logging()
 from PySpice.Spice.Netlist import Circuit
@@ -109,14 +115,169 @@ class ShortestPathValueHeuristic(ValueHeuristic):
         # can't reach the other side, distance is infinite
         return float('inf')
 
+# the shortest path heuristic computed incrementally: for each player the distances of the cells from both
+# its edges (the empty cells cost 1, the own stones 0, the opponent stones are blocked) are kept for each position
+# of the game history, like the ChargeHeuristic states. The distances of a new position are repaired from the ones
+# of the previous position: the stone of the player who moved can only shorten its paths, so they are relaxed
+# from the cell, while the opponent loses the cell, so only the cells whose shortest paths could pass through it
+# are computed again (Ramalingam and Reps, An incremental algorithm for a generalization of the shortest-path problem).
+# Going back in the history is just a lookup, so a leaf evaluation is a lookup plus the repair of one move
+class IncrementalShortestPathValueHeuristic(ShortestPathValueHeuristic):
+    # the distance of the cells which can't be reached
+    _INF = 1 << 30
+
+    def __init__(self):
+        self.n = None
+        # the moves (with their player) of the positions kept, and for each position its cells and its distance maps
+        self.moves = []
+        self.states = []
+
+    def compute(self, game):
+        # a board without the two edge rows is not handled by the distance maps
+        if game.n < 2:
+            return super().compute(game)
+        _, distances = self._state(game)
+        k_p1 = self._distance(distances, 1)
+        k_p2 = self._distance(distances, -1)
+        return k_p2 - k_p1
+
+    def potentials(self, game, player):
+        # for each cell (r, c) the length of the shortest path of player through it, from both the edges
+        _, distances = self._state(game)
+        cells, _ = self.states[-1]
+        from_first, from_second = distances[(player, 0)], distances[(player, 1)]
+        n = self.n
+        return [[from_first[r * n + c] + from_second[r * n + c] - (cells[r * n + c] == 0)
+                 if max(from_first[r * n + c], from_second[r * n + c]) < self._INF else math.inf
+                 for c in range(n)] for r in range(n)]
+
+    def _distance(self, distances, player):
+        # the distance of the second edge from the first one
+        from_first = distances[(player, 0)]
+        k = min(from_first[cell] for cell in self.edge_cells[(player, 1)])
+        return k if k < self._INF else math.inf
+
+    def _reset(self, n):
+        self.n = n
+        self.neighbors = [[(r + dr) * n + c + dc for dr, dc in [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+                           if 0 <= r + dr < n and 0 <= c + dc < n] for r in range(n) for c in range(n)]
+        # the cells of the two edges of each player: player 1 connects the left and right edges, player -1
+        # the top and bottom ones
+        self.edge_cells = {(1, 0): [r * n for r in range(n)], (1, 1): [r * n + n - 1 for r in range(n)],
+                           (-1, 0): list(range(n)), (-1, 1): [(n - 1) * n + c for c in range(n)]}
+        self.on_edge = dict()
+        for key, edge in self.edge_cells.items():
+            self.on_edge[key] = bytearray(n * n)
+            for cell in edge:
+                self.on_edge[key][cell] = 1
+        # the empty board
+        cells = [0] * (n * n)
+        distances = dict()
+        for key in self.edge_cells:
+            distance = [self._INF] * (n * n)
+            queue = []
+            for cell in self.edge_cells[key]:
+                distance[cell] = 1
+                queue.append((1, cell))
+            self._relax(cells, key[0], distance, queue)
+            distances[key] = distance
+        self.moves = []
+        self.states = [(cells, distances)]
+
+    def _state(self, game):
+        # the cells and the distances of the current position
+        if self.n != game.n:
+            self._reset(game.n)
+        same_moves = 0
+        for (r, c), state_move in zip(game.history, self.moves):
+            if (r, c, game.grid[r][c]) != state_move:
+                break
+            same_moves += 1
+        # remove the positions of the other branches
+        del self.moves[same_moves:]
+        del self.states[same_moves + 1:]
+        for r, c in game.history[same_moves:]:
+            self.states.append(self._play(*self.states[-1], r * self.n + c, game.grid[r][c]))
+            self.moves.append((r, c, game.grid[r][c]))
+        return self.states[-1]
+
+    def _play(self, cells, distances, cell, player):
+        # the cells and the distances after player puts a stone on cell
+        cells = cells[:]
+        cells[cell] = player
+        new_distances = dict()
+        for key, distance in distances.items():
+            distance = distance[:]
+            if key[0] == player:
+                # the cell costs 0 now, the paths through it get shorter by 1
+                if distance[cell] < self._INF:
+                    distance[cell] -= 1
+                    self._relax(cells, player, distance, [(distance[cell], cell)])
+            else:
+                self._block(cells, key, distance, cell)
+            new_distances[key] = distance
+        return cells, new_distances
+
+    def _block(self, cells, key, distance, cell):
+        # repairs the distances of player after the opponent took cell
+        player = key[0]
+        # the cells reached from cell through tight edges (the ones along which the distance grows
+        # by the cost of the next cell) are the only ones whose shortest paths may pass through cell
+        affected = {cell}
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            for neighbor in self.neighbors[current]:
+                state = cells[neighbor]
+                if neighbor not in affected and state != -player and \
+                        distance[current] + (state == 0) == distance[neighbor]:
+                    affected.add(neighbor)
+                    stack.append(neighbor)
+        for current in affected:
+            distance[current] = self._INF
+        # the affected cells start from their neighbors which are not affected (or from the edge)
+        queue = []
+        on_edge = self.on_edge[key]
+        for current in affected:
+            if current == cell:
+                continue
+            best = 0 if on_edge[current] else self._INF
+            for neighbor in self.neighbors[current]:
+                if distance[neighbor] < best:
+                    best = distance[neighbor]
+            if best < self._INF:
+                distance[current] = best + (cells[current] == 0)
+                queue.append((distance[current], current))
+        heapify(queue)
+        self._relax(cells, player, distance, queue)
+
+    def _relax(self, cells, player, distance, queue):
+        # Dijkstra from the cells of the queue (a heap of (distance, cell)), the cells cost 1 if empty,
+        # 0 if of player and can't be passed if of the opponent
+        while queue:
+            current_distance, current = heappop(queue)
+            if current_distance > distance[current]:
+                continue
+            for neighbor in self.neighbors[current]:
+                state = cells[neighbor]
+                if state == -player:
+                    continue
+                new_distance = current_distance + (state == 0)
+                if new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    heappush(queue, (new_distance, neighbor))
+
 # pag 37 jackmsc.pdf
 class TwoDistanceValueHeuristic(ValueHeuristic):
 
     def compute(self, game):
-        winner = game.check_game()
         # J measures who is the player closer to winning
         k_p1 = self._two_distance(game, 1)
         k_p2 = self._two_distance(game, -1)
+        return self._value(game, k_p1, k_p2)
+
+    def _value(self, game, k_p1, k_p2):
+        # when a player can't reach its edge the shortest path distances break the tie
         J = k_p2 - k_p1
         if math.isinf(J):
             J = int(math.copysign(100, J)) + ShortestPathValueHeuristic().compute(game)
@@ -185,6 +346,140 @@ class TwoDistanceValueHeuristic(ValueHeuristic):
         # can't reach the other side, distance is infinite
         return math.inf
 
+# the two distance computed with numpy array operations on the whole board, which also gives the
+# two distance of every cell from both the edges of both the players (the potentials, Van Rijswijck).
+# The groups of stones of the player are contracted: an empty cell is adjacent to the empty cells and the
+# edge nodes touching its adjacent groups. The potentials grow one level at a time: an empty cell gets the
+# level d when at least two different adjacent nodes have a potential smaller than d. The test takes the
+# smallest and the largest index of the reached nodes adjacent to each cell from the six shifted slices of
+# the padded (n + 2, n + 2) board, where the stones hold the ones of their group, and checks that they
+# differ: O(n^2) per level. The boards of both the players (and edges) are relaxed together.
+# The values are the same of TwoDistanceValueHeuristic
+class ArrayTwoDistanceValueHeuristic(TwoDistanceValueHeuristic):
+    # the padded boards already built for each board size
+    _topologies = dict()
+    # the neighbors of a cell for scipy.ndimage.label, in the (r, c) layout of each board of a stack
+    _hex_structure = np.array([[[0, 0, 0], [0, 0, 0], [0, 0, 0]],
+                               [[0, 1, 1], [1, 1, 1], [1, 1, 0]],
+                               [[0, 0, 0], [0, 0, 0], [0, 0, 0]]])
+    _offsets = [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+
+    def compute(self, game):
+        # the boards of the two players are relaxed together
+        _, (k_p1, k_p2) = self._potentials(np.stack([self._oriented(game, 1, 0), self._oriented(game, -1, 0)]),
+                                           full=False)
+        return self._value(game, k_p1, k_p2)
+
+    def potentials(self, game):
+        # J and, for each player and edge (0 the first edge, 1 the second), the (n, n) array of the two
+        # distances of the empty cells from the edge (inf for the stones and the cells which can't reach it).
+        # The first edge is the one TwoDistanceValueHeuristic starts from: the right one for player 1,
+        # the bottom one for player -1
+        boards = [(player, edge) for player in [1, -1] for edge in [0, 1]]
+        potentials, distances = self._potentials(np.stack([self._oriented(game, player, edge)
+                                                           for player, edge in boards]))
+        maps = {(player, edge): self._oriented_back(potential, player, edge)
+                for (player, edge), potential in zip(boards, potentials)}
+        return self._value(game, distances[0], distances[2]), maps
+
+    @staticmethod
+    def _oriented(game, player, edge):
+        # the board seen by player as player 1 connecting from the right edge (the transpose keeps the
+        # neighbors of the cells, the rotation swaps the edges)
+        grid = np.array(game.grid, dtype=np.int8)
+        if player == -1:
+            grid = -grid.T
+        return grid[::-1, ::-1] if edge == 1 else grid
+
+    @staticmethod
+    def _oriented_back(potential, player, edge):
+        if edge == 1:
+            potential = potential[::-1, ::-1]
+        return potential.T if player == -1 else potential
+
+    @classmethod
+    def _topology(cls, n):
+        # the cell (r, c) is at (r + 1, c + 1) of the padded board, whose column n + 1 holds the n + 1 nodes of
+        # the right edge, the virtual cells (i, n) for i in -1...n-1 of TwoDistanceValueHeuristic.
+        # Returns the mask of the edge nodes, the position of each padded cell in the padded board framed by one
+        # more row and column and the offsets of the six neighbors in the framed board
+        if n not in cls._topologies:
+            size = n + 2
+            edge = np.zeros((size, size), dtype=bool)
+            edge[:n + 1, n + 1] = True
+            framed_ids = np.arange(size + 2)[1:-1, None] * (size + 2) + np.arange(size + 2)[1:-1]
+            offsets = np.array([dr * (size + 2) + dc for dr, dc in cls._offsets])
+            cls._topologies[n] = edge, framed_ids, offsets
+        return cls._topologies[n]
+
+    @classmethod
+    def _neighbors(cls, framed, size):
+        # the six neighbors of each padded cell, as views of the boards framed by one more row and column
+        return [framed[..., 1 + dr:1 + dr + size, 1 + dc:1 + dc + size] for dr, dc in cls._offsets]
+
+    def _potentials(self, grids, full=True):
+        # for a stack of boards the two distances of the cells from the right edge for player 1 and the two
+        # distance of the left edge, without full the levels stop when the two distances of the left edge are known
+        n_boards, n = grids.shape[0], grids.shape[1]
+        size = n + 2
+        edge, framed_ids, offsets = self._topology(n)
+        # the position of each padded cell in the stack of framed boards
+        ids = np.arange(n_boards)[:, None, None] * (size + 2) ** 2 + framed_ids
+        # the nodes are the empty cells and the edge nodes
+        nodes = np.broadcast_to(edge, (n_boards, size, size)).copy()
+        nodes[:, 1:n + 1, 1:n + 1] = grids == 0
+        # the stones of the player sorted by group (the groups are numbered across the boards), with the
+        # positions of their neighbors
+        labels, _ = ndimage.label(grids == 1, structure=self._hex_structure)
+        stone_labels = labels[labels > 0]
+        by_group = np.argsort(stone_labels, kind='stable')
+        stones = ids[:, 1:n + 1, 1:n + 1][labels > 0][by_group]
+        group_sizes = np.diff(np.flatnonzero(np.r_[True, np.diff(stone_labels[by_group]) != 0, True]))
+        group_starts = np.r_[0, np.cumsum(group_sizes)[:-1]] * len(offsets)
+        stone_neighbors = (stones[:, None] + offsets).ravel()
+        # the framed boards hold the position of the reached nodes and its opposite, so that one minimum gives
+        # the smallest and the largest position of the reached nodes adjacent to each cell (none if there are
+        # none). The stones hold the ones of the reached nodes adjacent to their group, so the cells adjacent
+        # to a group see the nodes adjacent to it
+        none = 2 * n_boards * (size + 2) ** 2
+        signed_ids = np.stack([ids, -ids])
+        framed = np.full((2, n_boards, size + 2, size + 2), none)
+        inner = framed[..., 1:-1, 1:-1]
+        flat_framed = framed.reshape(2, -1)
+        neighbors = self._neighbors(framed, size)
+        potential = np.full((n_boards, size, size), math.inf)
+        potential[:, edge] = 0
+        np.copyto(inner, signed_ids, where=edge)
+        unreached = nodes & ~edge
+        smallest = np.empty((2, n_boards, size, size), dtype=int)
+        # the levels before the left edge has two adjacent reached nodes
+        distances = np.zeros(n_boards, dtype=int)
+        level = 0
+        while True:
+            if len(stones):
+                # the stones of each group take the reached nodes adjacent to any of them
+                group_smallest = np.minimum.reduceat(flat_framed[:, stone_neighbors], group_starts, axis=1)
+                flat_framed[:, stones] = np.repeat(group_smallest, group_sizes, axis=1)
+            # the left edge is adjacent to the cells of the first column and, through the stones, to the nodes
+            # adjacent to the groups touching it
+            left = inner[:, :, 1:n + 1, 1].min(axis=2)
+            left_reached = left[0] < -left[1]
+            if not full and left_reached.all():
+                break
+            distances += ~left_reached
+            level += 1
+            np.minimum(neighbors[0], neighbors[1], out=smallest)
+            for neighbor in neighbors[2:]:
+                np.minimum(smallest, neighbor, out=smallest)
+            new = unreached & (smallest[0] < -smallest[1])
+            if not new.any():
+                break
+            potential[new] = level
+            np.copyto(inner, signed_ids, where=new)
+            unreached ^= new
+        return potential[:, 1:n + 1, 1:n + 1], [int(distance) if reached else math.inf
+                                                for distance, reached in zip(distances, left_reached)]
+
 # Pag 8 y_hex.pdf
 class MaxFlowValueHeuristic(ValueHeuristic):
 
@@ -382,6 +677,18 @@ class ResistanceValueHeuristic(ValueHeuristic):
 
         return Req
 
+# the same resistance heuristic solved in process: the circuit is built as a scipy sparse Laplacian,
+# with the nodes linked by 0 ohm merged, and solved with a sparse LU factorization (see resistance.py).
+# The PySpice one is kept as the reference. The solver can be shared with CurrentFlowOrderHeuristic
+class SparseResistanceValueHeuristic(ResistanceValueHeuristic):
+
+    def __init__(self, solver=None):
+        self.solver = solver if solver is not None else ResistanceSolver()
+
+    def _resistance(self, game, player):
+        resistance, _ = self.solver.solve(game, player)
+        return resistance
+
 # Pag 10 y_hex.pdf
 class YReductionValueHeuristic(ValueHeuristic):
 
@@ -414,6 +721,75 @@ class YReductionValueHeuristic(ValueHeuristic):
 
         return yboard[0][0]
 
+# Monte Carlo evaluation: J is the average winner of k random playouts,
+# run all at once with numpy
+class PlayoutValueHeuristic(ValueHeuristic):
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+
+    def compute(self, game):
+        winners, _, _ = batch_playouts(game, self.k, self.rng)
+        return float(winners.mean())
+
+# memoizes another value heuristic: the values are kept by the Zobrist key of the position (which includes
+# the player in turn, so the transpositions hit) in a LRU cache bounded in memory, so the positions searched
+# again by the next moves and the ones shown by the ui are computed once. The cache is locked, so it can be
+# shared by threads (the search, the ponderer and the ui), the values are computed out of the lock
+class CachedValueHeuristic(ValueHeuristic):
+    # the estimated memory taken by an entry: the ordered dict node plus the key and value objects
+    ENTRY_BYTES = 200
+
+    def __init__(self, heuristic, max_bytes=16 * 2 ** 20):
+        self.heuristic = heuristic
+        self.max_entries = max(1, max_bytes // self.ENTRY_BYTES)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        # the statistics of the cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        # the lock can't be copied, the copies (e.g. the ones of the worker processes) get their own
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def compute(self, game):
+        key = game.zobrist_key
+        with self.lock:
+            J = self.cache.get(key)
+            if J is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return J
+            self.misses += 1
+        J = self.heuristic.compute(game)
+        with self.lock:
+            self.cache[key] = J
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+        return J
+
+    def hit_rate(self):
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def memory(self):
+        # the estimated bytes taken by the cache
+        return len(self.cache) * self.ENTRY_BYTES
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
 
 # ============================================= Node Ordering Heuristics =============================================
 
@@ -424,12 +800,127 @@ class OrderHeuristic():
     def sort(self, game, available_nodes):
         pass
 
+    def sort_keys(self, game, available_nodes):
+        # the key of each move in the order of sort, the moves the heuristic can't tell apart have the same key;
+        # by default each move has its position in the order
+        return {move: i for i, move in enumerate(self.sort(game, list(available_nodes)))}
+
+    def cutoff(self, game, move, depth):
+        # called by the search when move caused a cutoff in the current position of game,
+        # searched with depth plies left
+        pass
+
+    def new_search(self):
+        # called before each search, the heuristic can age what it learned in the previous searches
+        pass
+
+    def new_game(self):
+        # called before the first search of a game, the heuristic can forget what it learned in the previous games
+        pass
+
 class RandomOrderHeuristic(OrderHeuristic):
 
     def sort(self, game, available_moves):
         random.shuffle(available_moves)
         return available_moves
 
+# killer moves and history heuristic (Schaeffer, The history heuristic and alpha-beta search enhancements in practice)
+# learns from the search which moves cause cutoffs: first the killer moves which caused the last cutoffs
+# at the same ply, then the moves by the sum of depth^2 of the cutoffs they caused anywhere.
+# If a base heuristic is given its order breaks the ties, or with base_first the killers and the history
+# break the ties of the base order (the moves with the same base sort key)
+class KillerHistoryOrderHeuristic(OrderHeuristic):
+
+    def __init__(self, size, base_heuristic=None, n_killers=2, base_first=False):
+        self.size = size
+        self.base_heuristic = base_heuristic
+        self.n_killers = n_killers
+        self.base_first = base_first
+        # for each ply (number of stones on the board) the last moves which caused a cutoff
+        self.killers = [[] for _ in range(size * size + 1)]
+        # for each player the history table of the board cells
+        self.history = {1: [[0] * size for _ in range(size)], -1: [[0] * size for _ in range(size)]}
+
+    def sort(self, game, available_moves):
+        killers = self.killers[len(game.history)]
+        history = self.history[game.player_turn]
+
+        def key(m):
+            return killers.index(m) if m in killers else self.n_killers, -history[m[0]][m[1]]
+
+        if self.base_heuristic is not None and self.base_first:
+            base_keys = self.base_heuristic.sort_keys(game, available_moves)
+            return sorted(available_moves, key=lambda m: (base_keys[m],) + key(m))
+        if self.base_heuristic is not None:
+            available_moves = self.base_heuristic.sort(game, available_moves)
+        # python sort is stable, so the moves with the same score keep the base order
+        return sorted(available_moves, key=key)
+
+    def cutoff(self, game, move, depth):
+        killers = self.killers[len(game.history)]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.n_killers:]
+        self.history[game.player_turn][move[0]][move[1]] += depth * depth
+        if self.base_heuristic is not None:
+            self.base_heuristic.cutoff(game, move, depth)
+
+    def new_search(self):
+        # the killers are indexed by ply so they stay valid, the history of the previous searches is halved
+        for player in self.history:
+            self.history[player] = [[value // 2 for value in row] for row in self.history[player]]
+        if self.base_heuristic is not None:
+            self.base_heuristic.new_search()
+
+    def new_game(self):
+        # the killers of a ply are the cutoffs of the positions of the previous game
+        self.killers = [[] for _ in range(self.size * self.size + 1)]
+        if self.base_heuristic is not None:
+            self.base_heuristic.new_game()
+
+    def clear(self):
+        self.killers = [[] for _ in range(self.size * self.size + 1)]
+        self.history = {1: [[0] * self.size for _ in range(self.size)],
+                        -1: [[0] * self.size for _ in range(self.size)]}
+
+# orders the moves by the current flowing through the cells in the resistor networks of both the players
+# (the circuits of the ResistanceValueHeuristic): the cells carrying more current are more critical to the
+# connections. One solve per player and node, shared with SparseResistanceValueHeuristic if it is given
+# the same ResistanceSolver, so the positions it already evaluated are not solved again
+class CurrentFlowOrderHeuristic(OrderHeuristic):
+
+    def __init__(self, solver=None):
+        self.solver = solver if solver is not None else ResistanceSolver()
+
+    def sort(self, game, available_moves):
+        keys = self.sort_keys(game, available_moves)
+        return sorted(available_moves, key=lambda m: keys[m])
+
+    def sort_keys(self, game, available_moves):
+        flow = self.current_flow(game)
+        return {m: -flow[m[0] * game.n + m[1]] for m in available_moves}
+
+    def current_flow(self, game):
+        # for each cell r * n + c the sum of the currents through it in the circuits of the two players,
+        # each circuit with a 1 A current between the edges
+        n = game.n
+        first, second = resistance_topology(n)['links']
+        flow = np.zeros(n * n)
+        for player in [1, -1]:
+            resistance, potentials = self.solver.solve(game, player)
+            if resistance == 0 or math.isinf(resistance):
+                continue
+            # the current of the 1 ohm links, the links outside the circuit have nan potentials
+            current = np.nan_to_num(potentials[first] - potentials[second])
+            forward, backward = np.maximum(current, 0), np.maximum(-current, 0)
+            # the current leaving and entering each cell through the links, the cells of the edges
+            # get the rest from the terminals
+            leaving = np.bincount(first, forward, n * n) + np.bincount(second, backward, n * n)
+            entering = np.bincount(second, forward, n * n) + np.bincount(first, backward, n * n)
+            flow += np.maximum(leaving, entering)
+        return flow
+
 # found on Github of rjewsbury
 # Treats stones as positive/negative charges, and tries to find saddle points in the field
 # supposed to represent choosing contested moves
@@ -442,8 +933,12 @@ class ChargeHeuristic(OrderHeuristic):
         self.states = []
 
     def sort(self, game, available_nodes):
+        keys = self.sort_keys(game, available_nodes)
+        return sorted(available_nodes, key=lambda m: keys[m])
+
+    def sort_keys(self, game, available_nodes):
         child_val = self.get_child_values(game)
-        return sorted(available_nodes, key=lambda m: child_val[m[0]][m[1]] * -game.player_turn)
+        return {m: child_val[m[0]][m[1]] * -game.player_turn for m in available_nodes}
 
     # finds an approximation of "curvature" if the board was an electric field
     def get_child_values(self, game):
@@ -9,8 +9,28 @@
 FILE: this file contains the game logic
 
 """
+import random
 from heapq import heappop, heappush
 
+# the seed of the Zobrist tables, so that position keys are reproducible between runs
+ZOBRIST_SEED = 2023
+# the Zobrist tables already generated for each board size
+_zobrist_tables = dict()
+
+
+def zobrist_tables(n):
+    """
+    :param n: the dimension of the board
+    :return: a dict with a list of 64-bit keys (one per cell r * n + c) for each player
+             and the key of the side to move
+    """
+    if n not in _zobrist_tables:
+        rng = random.Random(ZOBRIST_SEED + n)
+        _zobrist_tables[n] = {1: [rng.getrandbits(64) for _ in range(n * n)],
+                              -1: [rng.getrandbits(64) for _ in range(n * n)],
+                              'side': rng.getrandbits(64)}
+    return _zobrist_tables[n]
+
 
 class Hex:
     """
@@ -32,18 +52,76 @@ class Hex:
         self.history = []
         # the player turn
         self.player_turn = starting_player
+        # the Zobrist key of the position, side to move included (player -1 to move)
+        self._zobrist = zobrist_tables(n)
+        self.zobrist_key = self._zobrist['side'] if starting_player == -1 else 0
+        # the empty cells, removed by swapping with the last one, with the position of each cell in the list
+        self._empty = [(r, c) for r in range(n) for c in range(n)]
+        self._empty_index = list(range(n * n))
+        # for each played move the position its cell had in the empty cells
+        self._empty_removed = []
+        # an undoable union-find over the cells (r * n + c) plus a virtual node for each edge:
+        # player 1 connects the left and right edges, player -1 the top and bottom ones
+        self._left, self._right, self._top, self._bottom = n * n, n * n + 1, n * n + 2, n * n + 3
+        self._parent = list(range(n * n + 4))
+        self._size = [1] * (n * n + 4)
+        # for each played move the list of (child_root, parent_root) unions it performed
+        self._unions = []
+        # for each cell the adjacent cells and the edges touched for each player
+        self._adjacent = []
+        for r in range(n):
+            for c in range(n):
+                adjacent = []
+                for dr, dc in [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]:
+                    if self._is_move_in_grid(r + dr, c + dc):
+                        adjacent.append((r + dr, c + dc, (r + dr) * n + c + dc))
+                edges = {1: [], -1: []}
+                if c == 0:
+                    edges[1].append(self._left)
+                if c == n - 1:
+                    edges[1].append(self._right)
+                if r == 0:
+                    edges[-1].append(self._top)
+                if r == n - 1:
+                    edges[-1].append(self._bottom)
+                self._adjacent.append((adjacent, edges))
 
     def check_game(self):
         """
         :return: 1 if 1 wins, -1 if -1 wins, None if the game is not finished yet.
         """
-        if self._has_connection(1):
+        if self._find(self._left) == self._find(self._right):
             return 1
-        elif self._has_connection(-1):
+        elif self._find(self._top) == self._find(self._bottom):
             return -1
         else:
             return None
 
+    def _find(self, node):
+        """
+        :param node: a cell index or an edge node
+        :return: the root of the set containing node
+        """
+        # no path compression, so that every union can be undone
+        parent = self._parent
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    def _union(self, node_a, node_b, unions):
+        """
+        Merges the sets of node_a and node_b (union by size), recording the union in unions.
+        """
+        root_a = self._find(node_a)
+        root_b = self._find(node_b)
+        if root_a == root_b:
+            return
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        unions.append((root_b, root_a))
+
     def _is_move_in_grid(self, r, c):
         """
         :param r: a row value
@@ -65,9 +143,7 @@ class Hex:
         # if move is valid
         r, c = move
         if self._is_move_in_grid(r, c) and self.grid[r][c] == 0:
-            self.grid[r][c] = self.player_turn
-            self.history.append((r, c))
-            self.player_turn *= -1
+            self.make_move((r, c))
             return True
         else:
             return False
@@ -76,12 +152,66 @@ class Hex:
         """
         Undo the last move.
         """
+        self.unmake_move()
+
+    def make_move(self, move):
+        """
+        Plays the specified move (r, c) for current turn player without any validity check.
+        Meant for the game search, where moves always come from available_moves.
+
+        :param move: a tuple of integers (r, c)
+        """
+        r, c = move
+        player = self.player_turn
+        self.grid[r][c] = player
+        self.history.append(move)
+        self.player_turn = -player
+        self.zobrist_key ^= self._zobrist[player][r * self.n + c] ^ self._zobrist['side']
+        # removes the cell from the empty cells
+        cell = r * self.n + c
+        index = self._empty_index[cell]
+        last = self._empty.pop()
+        if index < len(self._empty):
+            self._empty[index] = last
+            self._empty_index[last[0] * self.n + last[1]] = index
+        self._empty_removed.append(index)
+        # joins the new stone with the adjacent stones of the same player and with its edges
+        adjacent, edges = self._adjacent[cell]
+        unions = []
+        for adj_r, adj_c, adj_cell in adjacent:
+            if self.grid[adj_r][adj_c] == player:
+                self._union(cell, adj_cell, unions)
+        for edge in edges[player]:
+            self._union(cell, edge, unions)
+        self._unions.append(unions)
+
+    def unmake_move(self):
+        """
+        Undo the last move played with make_move (or play_move).
+        """
         self.player_turn *= -1
         r, c = self.history.pop()
         self.grid[r][c] = 0
+        self.zobrist_key ^= self._zobrist[self.player_turn][r * self.n + c] ^ self._zobrist['side']
+        # puts the cell back in its position of the empty cells, and the swapped cell back at the end
+        index = self._empty_removed.pop()
+        if index < len(self._empty):
+            swapped = self._empty[index]
+            self._empty_index[swapped[0] * self.n + swapped[1]] = len(self._empty)
+            self._empty.append(swapped)
+            self._empty[index] = (r, c)
+        else:
+            self._empty.append((r, c))
+        self._empty_index[r * self.n + c] = index
+        # splits the sets in reverse order of union
+        for child, parent in reversed(self._unions.pop()):
+            self._parent[child] = child
+            self._size[parent] -= self._size[child]
 
     def _has_connection(self, player):
         """
+        Checks the connection from scratch, without using the union-find.
+
         :param player: 1 or -1
         :return: True if there is a connection between edges of player
         """
@@ -126,12 +256,23 @@ class Hex:
         """
         :return: a list of all remaining valid moves.
         """
-        moves = []
-        for r in range(0, self.n):
-            for c in range(0, self.n):
-                if self.grid[r][c] == 0:
-                    moves.append((r, c))
-        return moves
+        return list(self._empty)
+
+    def available_moves_view(self):
+        """
+        A cheaper version of available_moves for the game search, which does not copy the moves.
+        The returned list must not be modified, and it stays valid as long as every move played
+        while iterating it is undone before the next iteration.
+
+        :return: the list of all remaining valid moves kept by the game.
+        """
+        return self._empty
+
+    def num_available_moves(self):
+        """
+        :return: the number of remaining valid moves.
+        """
+        return len(self._empty)
 
     def draw_board_tty(self):
         """
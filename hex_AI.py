@@ -9,13 +9,22 @@
 FILE: this file contains the game solving functions
 
 """
+import functools
 import math
+import threading
+import time
+from copy import deepcopy
 import heuristics
+import mcts
+import parallel_search
+from search_common import SearchTimeout, lookup_position, store_position
+from transposition import EXACT, TranspositionTable
 
 
 def minimax(game, maximize, depth=0, max_depth=math.inf,
             node_value_heuristic=heuristics.ShortestPathValueHeuristic,
-            node_ordering_heuristic=heuristics.RandomOrderHeuristic):
+            node_ordering_heuristic=heuristics.RandomOrderHeuristic,
+            transposition_table=None):
     """
     The Minimax algorithm for solving a game.
 
@@ -25,6 +34,7 @@ def minimax(game, maximize, depth=0, max_depth=math.inf,
     :param max_depth: the max depth to search until
     :param node_value_heuristic: the heuristic the algorithm will use to evaluate a position
     :param node_ordering_heuristic: an orderding heuristic on the positions
+    :param transposition_table: a TranspositionTable to reuse the values of already searched positions, or None
     :return: the current minimax value and the best move to execute
     """
     winner = game.check_game()
@@ -34,6 +44,13 @@ def minimax(game, maximize, depth=0, max_depth=math.inf,
         # compute the heuristic function
         J = node_value_heuristic().compute(game)
         return J, None
+    # if the position was already searched deep enough reuse its value: minimax has no window, so only
+    # the exact values (not the bounds stored by a-b pruning sharing the table) are enough
+    if transposition_table is not None:
+        value, _, _, hash_move = lookup_position(transposition_table, game, max_depth - depth,
+                                                 -math.inf, math.inf)
+        if value is not None:
+            return value, hash_move
     curr_minimax_value = -float('inf') if maximize else float('inf')
     # compute legal moves
     available_moves = game.available_moves()
@@ -42,14 +59,17 @@ def minimax(game, maximize, depth=0, max_depth=math.inf,
     # for each possible move at current position
     for move in available_moves:
         # suppose to play move
-        game.play_move(move)
+        game.make_move(move)
         # compute the minimax value using the opponent
-        minimax_value, _ = minimax(game, not maximize, depth=depth+1, max_depth=max_depth, node_value_heuristic=node_value_heuristic)
-        game.undo_move()
+        minimax_value, _ = minimax(game, not maximize, depth=depth+1, max_depth=max_depth, node_value_heuristic=node_value_heuristic,
+                                   transposition_table=transposition_table)
+        game.unmake_move()
         # update the best move according the max/min minimax value
         if (maximize and (minimax_value > curr_minimax_value or curr_minimax_value == float('-inf'))) or (not maximize and (minimax_value < curr_minimax_value or curr_minimax_value == float('inf'))):
             curr_minimax_value = minimax_value
             best_move = move
+    if transposition_table is not None:
+        transposition_table.store(game.zobrist_key, curr_minimax_value, max_depth - depth, EXACT, best_move)
     # returning the minimax value and the best move for the player
     return curr_minimax_value, best_move
 
@@ -58,7 +78,13 @@ def alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
                        node_value_heuristic=heuristics.ShortestPathValueHeuristic,
                        node_ordering_heuristic=heuristics.RandomOrderHeuristic,
                        alpha=-float('inf'),
-                       beta=float('inf')):
+                       beta=float('inf'),
+                       transposition_table=None,
+                       deadline=None,
+                       stop_event=None,
+                       virtual_connections=None,
+                       inferior_cells=None,
+                       stats=None):
     """
     The a-b pruning algorithm for solving a game.
 
@@ -70,8 +96,18 @@ def alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
     :param node_ordering_heuristic: an orderding heuristic on the positions
     :param alpha: the current alpha value
     :param beta: the current beta value
+    :param transposition_table: a TranspositionTable to reuse the values of already searched positions, or None
+    :param deadline: the time.time() after which the search raises SearchTimeout, or None
+    :param stop_event: a threading.Event which stops the search raising SearchTimeout when set, or None
+    :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+    :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+    :param stats: a search_stats.SearchStats collecting the statistics of the search, or None
     :return: the current minimax value and the best move to execute
     """
+    if (deadline is not None and time.time() > deadline) or (stop_event is not None and stop_event.is_set()):
+        raise SearchTimeout()
+    if stats is not None:
+        stats.node(depth)
     winner = game.check_game()
     # if position is terminal (the game is ended) or max search depth reached
     # return the position value and no move can be done
@@ -79,23 +115,341 @@ def alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
         return winner * float('inf'), None
     elif depth >= max_depth:
         # compute the heuristic function
-        J = node_value_heuristic.compute(game)
+        J = node_value_heuristic.compute(game) if stats is None else stats.evaluate(node_value_heuristic, game)
         return J, None
+    # if the position was already searched use its value if deep enough, else its best move
+    hash_move = None
+    if transposition_table is not None:
+        original_alpha, original_beta = alpha, beta
+        value, alpha, beta, hash_move = lookup_position(transposition_table, game, max_depth - depth, alpha, beta)
+        if value is not None:
+            return value, hash_move
+    # the virtual connections prove the wins before the stones are connected, at the root a move is still needed
+    must_play = None
+    if virtual_connections is not None:
+        proven_winner, must_play = virtual_connections.analyze(game)
+        if proven_winner is not None and depth > 0:
+            return proven_winner * float('inf'), None
+    # the dead and captured cells are never better than the other moves
+    inferior = 0
+    if inferior_cells is not None:
+        proven_winner, inferior = inferior_cells.analyze(game)
+        if proven_winner is not None and depth > 0:
+            return proven_winner * float('inf'), None
     curr_minimax_value = -float('inf') if maximize else float('inf')
     # compute legal moves
     available_moves = game.available_moves()
+    # only the moves which can stop the opponent semi connections
+    if must_play is not None:
+        available_moves = [move for move in available_moves if must_play >> move[0] * game.n + move[1] & 1]
+    # at least a move is kept
+    if inferior:
+        available_moves = [move for move in available_moves if not inferior >> move[0] * game.n + move[1] & 1] \
+            or available_moves[:1]
     # sort moves according node_ordering_heuristic
-    available_moves = node_ordering_heuristic.sort(game, available_moves)
+    if stats is None:
+        available_moves = node_ordering_heuristic.sort(game, available_moves)
+    else:
+        available_moves = stats.sort(node_ordering_heuristic, game, available_moves)
+    # the stored best move is searched first
+    if hash_move is not None and hash_move in available_moves:
+        available_moves.remove(hash_move)
+        available_moves.insert(0, hash_move)
     # for each possible move at current position
-    for move in available_moves:
+    for i, move in enumerate(available_moves):
         # suppose to play move
-        game.play_move(move)
+        game.make_move(move)
         # compute the minimax value using the opponent
         minimax_value, _ = alpha_beta_pruning(game, not maximize, depth=depth+1, max_depth=max_depth,
                                               node_value_heuristic=node_value_heuristic,
                                               node_ordering_heuristic=node_ordering_heuristic,
-                                              alpha=alpha, beta=beta)
-        game.undo_move()
+                                              alpha=alpha, beta=beta, transposition_table=transposition_table,
+                                              deadline=deadline, stop_event=stop_event,
+                                              virtual_connections=virtual_connections,
+                                              inferior_cells=inferior_cells,
+                                              stats=stats)
+        game.unmake_move()
+        # update the best move according the max/min minimax value
+        if (maximize and (minimax_value > curr_minimax_value or curr_minimax_value == float('-inf'))) or (not maximize and (minimax_value < curr_minimax_value or curr_minimax_value == float('inf'))):
+            curr_minimax_value = minimax_value
+            best_move = move
+        # alpha beta cutoff
+        if maximize:
+            alpha = max(alpha, minimax_value)
+        else:
+            beta = min(beta, minimax_value)
+        if beta <= alpha:
+            node_ordering_heuristic.cutoff(game, move, max_depth - depth)
+            if stats is not None:
+                stats.cutoff(i)
+            break
+    if transposition_table is not None:
+        store_position(transposition_table, game, max_depth - depth, curr_minimax_value, best_move,
+                       original_alpha, original_beta)
+    # returning the minimax value and the best move for the player
+    return curr_minimax_value, best_move
+
+
+def iterative_alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
+                                 node_value_heuristic=heuristics.ShortestPathValueHeuristic,
+                                 node_ordering_heuristic=heuristics.RandomOrderHeuristic,
+                                 alpha=-float('inf'),
+                                 beta=float('inf'),
+                                 transposition_table=None,
+                                 deadline=None,
+                                 stop_event=None,
+                                 virtual_connections=None,
+                                 inferior_cells=None,
+                                 stats=None):
+    """
+    The a-b pruning algorithm without recursion: the nodes on the current path are frames of an explicit stack,
+    preallocated as lists indexed by ply (the moves, the index of the move being searched, alpha, beta,
+    the best value and the best move). It visits the same nodes in the same order of alpha_beta_pruning,
+    so it returns the same value and move, and it takes the same parameters.
+
+    :param game: the game object
+    :param maximize: True if first player wants to maximize the minimax value
+    :param depth: the current tree visit depth
+    :param max_depth: the max depth to search until
+    :param node_value_heuristic: the heuristic the algorithm will use to evaluate a position
+    :param node_ordering_heuristic: an orderding heuristic on the positions
+    :param alpha: the current alpha value
+    :param beta: the current beta value
+    :param transposition_table: a TranspositionTable to reuse the values of already searched positions, or None
+    :param deadline: the time.time() after which the search raises SearchTimeout, or None
+    :param stop_event: a threading.Event which stops the search raising SearchTimeout when set, or None
+    :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+    :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+    :param stats: a search_stats.SearchStats collecting the statistics of the search, or None
+    :return: the current minimax value and the best move to execute
+    """
+    # the stack of frames, one for each ply below the root
+    n_plies = int(min(max_depth - depth, game.num_available_moves())) + 1
+    moves = [None] * n_plies
+    indices = [0] * n_plies
+    alphas = [0.0] * n_plies
+    betas = [0.0] * n_plies
+    values = [0.0] * n_plies
+    best_moves = [None] * n_plies
+    original_alphas = [0.0] * n_plies
+    original_betas = [0.0] * n_plies
+    ply = 0
+    node_alpha, node_beta = alpha, beta
+    while True:
+        # enters the node at ply, its value is the one of a leaf or it gets a frame
+        node_depth = depth + ply
+        node_maximize = maximize if ply % 2 == 0 else not maximize
+        if (deadline is not None and time.time() > deadline) or (stop_event is not None and stop_event.is_set()):
+            raise SearchTimeout()
+        if stats is not None:
+            stats.node(node_depth)
+        value, node_move = None, None
+        winner = game.check_game()
+        if winner is not None:
+            value = winner * float('inf')
+        elif node_depth >= max_depth:
+            value = node_value_heuristic.compute(game) if stats is None else stats.evaluate(node_value_heuristic, game)
+        else:
+            hash_move = None
+            if transposition_table is not None:
+                original_alphas[ply], original_betas[ply] = node_alpha, node_beta
+                value, node_alpha, node_beta, hash_move = lookup_position(transposition_table, game,
+                                                                          max_depth - node_depth,
+                                                                          node_alpha, node_beta)
+                node_move = hash_move
+            must_play = None
+            if value is None and virtual_connections is not None:
+                proven_winner, must_play = virtual_connections.analyze(game)
+                if proven_winner is not None and node_depth > 0:
+                    value, node_move = proven_winner * float('inf'), None
+            inferior = 0
+            if value is None and inferior_cells is not None:
+                proven_winner, inferior = inferior_cells.analyze(game)
+                if proven_winner is not None and node_depth > 0:
+                    value, node_move = proven_winner * float('inf'), None
+            if value is None:
+                # a new frame, the first move is searched
+                available_moves = game.available_moves()
+                if must_play is not None:
+                    available_moves = [move for move in available_moves if must_play >> move[0] * game.n + move[1] & 1]
+                if inferior:
+                    available_moves = [move for move in available_moves
+                                       if not inferior >> move[0] * game.n + move[1] & 1] or available_moves[:1]
+                if stats is None:
+                    available_moves = node_ordering_heuristic.sort(game, available_moves)
+                else:
+                    available_moves = stats.sort(node_ordering_heuristic, game, available_moves)
+                if hash_move is not None and hash_move in available_moves:
+                    available_moves.remove(hash_move)
+                    available_moves.insert(0, hash_move)
+                moves[ply] = available_moves
+                indices[ply] = 0
+                alphas[ply], betas[ply] = node_alpha, node_beta
+                values[ply] = -float('inf') if node_maximize else float('inf')
+                best_moves[ply] = None
+                game.make_move(available_moves[0])
+                ply += 1
+                continue
+        # returns the value to the parent frames, until one has other moves to search
+        while True:
+            if ply == 0:
+                return value, node_move
+            ply -= 1
+            game.unmake_move()
+            node_depth = depth + ply
+            node_maximize = maximize if ply % 2 == 0 else not maximize
+            i = indices[ply]
+            move = moves[ply][i]
+            # update the best move according the max/min minimax value
+            if (node_maximize and (value > values[ply] or values[ply] == float('-inf'))) or \
+                    (not node_maximize and (value < values[ply] or values[ply] == float('inf'))):
+                values[ply] = value
+                best_moves[ply] = move
+            # alpha beta cutoff
+            if node_maximize:
+                alphas[ply] = max(alphas[ply], value)
+            else:
+                betas[ply] = min(betas[ply], value)
+            cutoff = betas[ply] <= alphas[ply]
+            if cutoff:
+                node_ordering_heuristic.cutoff(game, move, max_depth - node_depth)
+                if stats is not None:
+                    stats.cutoff(i)
+            if not cutoff and i + 1 < len(moves[ply]):
+                # the next move of the frame
+                indices[ply] = i + 1
+                game.make_move(moves[ply][i + 1])
+                node_alpha, node_beta = alphas[ply], betas[ply]
+                ply += 1
+                break
+            # the frame is done
+            if transposition_table is not None:
+                store_position(transposition_table, game, max_depth - node_depth, values[ply], best_moves[ply],
+                               original_alphas[ply], original_betas[ply])
+            value, node_move = values[ply], best_moves[ply]
+            moves[ply] = None
+
+
+def principal_variation_search(game, maximize, depth=0, max_depth=math.inf,
+                               node_value_heuristic=heuristics.ShortestPathValueHeuristic,
+                               node_ordering_heuristic=heuristics.RandomOrderHeuristic,
+                               alpha=-float('inf'),
+                               beta=float('inf'),
+                               transposition_table=None,
+                               deadline=None,
+                               stop_event=None,
+                               virtual_connections=None,
+                               inferior_cells=None,
+                               stats=None):
+    """
+    The principal variation search (NegaScout) algorithm for solving a game.
+    The first move is searched with the (alpha, beta) window, the others with a null window
+    to just prove they are not better, and they are searched again only when they are.
+    It takes the same parameters of alpha_beta_pruning.
+
+    :param game: the game object
+    :param maximize: True if first player wants to maximize the minimax value
+    :param depth: the current tree visit depth
+    :param max_depth: the max depth to search until
+    :param node_value_heuristic: the heuristic the algorithm will use to evaluate a position
+    :param node_ordering_heuristic: an orderding heuristic on the positions
+    :param alpha: the current alpha value
+    :param beta: the current beta value
+    :param transposition_table: a TranspositionTable to reuse the values of already searched positions, or None
+    :param deadline: the time.time() after which the search raises SearchTimeout, or None
+    :param stop_event: a threading.Event which stops the search raising SearchTimeout when set, or None
+    :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+    :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+    :param stats: a search_stats.SearchStats collecting the statistics of the search, or None
+    :return: the current minimax value and the best move to execute
+    """
+    if (deadline is not None and time.time() > deadline) or (stop_event is not None and stop_event.is_set()):
+        raise SearchTimeout()
+    if stats is not None:
+        stats.node(depth)
+    winner = game.check_game()
+    # if position is terminal (the game is ended) or max search depth reached
+    # return the position value and no move can be done
+    if winner is not None:
+        return winner * float('inf'), None
+    elif depth >= max_depth:
+        # compute the heuristic function
+        J = node_value_heuristic.compute(game) if stats is None else stats.evaluate(node_value_heuristic, game)
+        return J, None
+    # if the position was already searched use its value if deep enough, else its best move
+    hash_move = None
+    if transposition_table is not None:
+        original_alpha, original_beta = alpha, beta
+        value, alpha, beta, hash_move = lookup_position(transposition_table, game, max_depth - depth, alpha, beta)
+        if value is not None:
+            return value, hash_move
+    # the virtual connections prove the wins before the stones are connected, at the root a move is still needed
+    must_play = None
+    if virtual_connections is not None:
+        proven_winner, must_play = virtual_connections.analyze(game)
+        if proven_winner is not None and depth > 0:
+            return proven_winner * float('inf'), None
+    # the dead and captured cells are never better than the other moves
+    inferior = 0
+    if inferior_cells is not None:
+        proven_winner, inferior = inferior_cells.analyze(game)
+        if proven_winner is not None and depth > 0:
+            return proven_winner * float('inf'), None
+    curr_minimax_value = -float('inf') if maximize else float('inf')
+    # compute legal moves
+    available_moves = game.available_moves()
+    # only the moves which can stop the opponent semi connections
+    if must_play is not None:
+        available_moves = [move for move in available_moves if must_play >> move[0] * game.n + move[1] & 1]
+    # at least a move is kept
+    if inferior:
+        available_moves = [move for move in available_moves if not inferior >> move[0] * game.n + move[1] & 1] \
+            or available_moves[:1]
+    # sort moves according node_ordering_heuristic
+    if stats is None:
+        available_moves = node_ordering_heuristic.sort(game, available_moves)
+    else:
+        available_moves = stats.sort(node_ordering_heuristic, game, available_moves)
+    # the stored best move is searched first
+    if hash_move is not None and hash_move in available_moves:
+        available_moves.remove(hash_move)
+        available_moves.insert(0, hash_move)
+    # for each possible move at current position
+    for i, move in enumerate(available_moves):
+        # suppose to play move
+        game.make_move(move)
+        minimax_value = None
+        if i > 0:
+            # null window search: the values are real numbers, so the window is
+            # between the bound and the next representable float
+            if maximize:
+                null_alpha, null_beta = alpha, math.nextafter(alpha, math.inf)
+            else:
+                null_alpha, null_beta = math.nextafter(beta, -math.inf), beta
+            minimax_value, _ = principal_variation_search(game, not maximize, depth=depth+1, max_depth=max_depth,
+                                                          node_value_heuristic=node_value_heuristic,
+                                                          node_ordering_heuristic=node_ordering_heuristic,
+                                                          alpha=null_alpha, beta=null_beta,
+                                                          transposition_table=transposition_table,
+                                                          deadline=deadline, stop_event=stop_event,
+                                                          virtual_connections=virtual_connections,
+                                                          inferior_cells=inferior_cells,
+                                                          stats=stats)
+            # the move may be better than the best one: the null window search failed high
+            if alpha < minimax_value < beta:
+                minimax_value = None
+        if minimax_value is None:
+            # full window search
+            minimax_value, _ = principal_variation_search(game, not maximize, depth=depth+1, max_depth=max_depth,
+                                                          node_value_heuristic=node_value_heuristic,
+                                                          node_ordering_heuristic=node_ordering_heuristic,
+                                                          alpha=alpha, beta=beta,
+                                                          transposition_table=transposition_table,
+                                                          deadline=deadline, stop_event=stop_event,
+                                                          virtual_connections=virtual_connections,
+                                                          inferior_cells=inferior_cells,
+                                                          stats=stats)
+        game.unmake_move()
         # update the best move according the max/min minimax value
         if (maximize and (minimax_value > curr_minimax_value or curr_minimax_value == float('-inf'))) or (not maximize and (minimax_value < curr_minimax_value or curr_minimax_value == float('inf'))):
             curr_minimax_value = minimax_value
@@ -106,11 +460,358 @@ def alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
         else:
             beta = min(beta, minimax_value)
         if beta <= alpha:
+            node_ordering_heuristic.cutoff(game, move, max_depth - depth)
+            if stats is not None:
+                stats.cutoff(i)
             break
+    if transposition_table is not None:
+        store_position(transposition_table, game, max_depth - depth, curr_minimax_value, best_move,
+                       original_alpha, original_beta)
     # returning the minimax value and the best move for the player
     return curr_minimax_value, best_move
 
 
+def iterative_deepening(game, maximize, max_depth=math.inf, deadline=None,
+                        node_value_heuristic=heuristics.ShortestPathValueHeuristic,
+                        node_ordering_heuristic=heuristics.RandomOrderHeuristic,
+                        transposition_table=None,
+                        search=alpha_beta_pruning,
+                        aspiration_window=None,
+                        stop_event=None,
+                        virtual_connections=None,
+                        inferior_cells=None,
+                        stats=None,
+                        callback=None):
+    """
+    Searches at depth 1, 2, 3... until max_depth or the deadline.
+    The best moves of each iteration are stored in the transposition table, so the next iteration
+    searches the principal variation first.
+
+    :param game: the game object
+    :param maximize: True if first player wants to maximize the minimax value
+    :param max_depth: the max depth to search until
+    :param deadline: the time.time() when the search must stop, or None
+    :param node_value_heuristic: the heuristic the algorithm will use to evaluate a position
+    :param node_ordering_heuristic: an orderding heuristic on the positions
+    :param transposition_table: the TranspositionTable to use, if None a new one is used
+    :param search: the search function, alpha_beta_pruning or principal_variation_search
+    :param aspiration_window: if not None, each iteration first searches the window
+                              (previous value - aspiration_window, previous value + aspiration_window)
+    :param stop_event: a threading.Event which stops the search when set, or None
+    :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+    :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+    :param stats: a search_stats.SearchStats collecting the statistics of the search, or None
+    :param callback: a function called with the value, the move and the depth of each completed iteration, or None
+    :return: the minimax value and the best move of the deepest completed iteration, and its depth
+    """
+    if transposition_table is None:
+        transposition_table = TranspositionTable(16 * 2 ** 20)
+    start_time = time.time()
+    n_moves = len(game.history)
+    value, move, depth = None, None, 0
+    # the search can't go deeper than the number of empty cells
+    while depth < min(max_depth, game.num_available_moves()):
+        try:
+            # the first iteration always completes, so that there is a move to play
+            search_deadline = deadline if depth > 0 else None
+            alpha, beta = -math.inf, math.inf
+            if aspiration_window is not None and value is not None:
+                alpha, beta = value - aspiration_window, value + aspiration_window
+            while True:
+                iteration_value, iteration_move = search(game, maximize, max_depth=depth + 1,
+                                                         node_value_heuristic=node_value_heuristic,
+                                                         node_ordering_heuristic=node_ordering_heuristic,
+                                                         alpha=alpha, beta=beta,
+                                                         transposition_table=transposition_table,
+                                                         deadline=search_deadline, stop_event=stop_event,
+                                                         virtual_connections=virtual_connections,
+                                                         inferior_cells=inferior_cells,
+                                                         stats=stats)
+                # the value is just a bound outside the aspiration window, the side which failed is widened
+                if iteration_value <= alpha and alpha > -math.inf:
+                    alpha = -math.inf
+                elif iteration_value >= beta and beta < math.inf:
+                    beta = math.inf
+                else:
+                    break
+        except SearchTimeout:
+            # undo the moves of the interrupted search, the result is the one of the last completed iteration
+            while len(game.history) > n_moves:
+                game.unmake_move()
+            break
+        value, move = iteration_value, iteration_move
+        depth += 1
+        if callback is not None:
+            callback(value, move, depth)
+        # the game is solved
+        if math.isinf(value):
+            break
+        # the next iteration would not complete in the remaining time
+        if deadline is not None and time.time() - start_time > (deadline - start_time) / 2:
+            break
+    return value, move, depth
+
+
+def _ai_config(config, player, key, default=None):
+    """
+    :param config: the game config
+    :param player: 1 (AI1) or -1 (AI2)
+    :param key: a config key
+    :return: the value of the AI1_/AI2_ key for player, else the value shared by both the AIs
+    """
+    return config.get(('AI1_' if player == 1 else 'AI2_') + key, config.get(key, default))
+
+
+def move_time_budget(game, config, player):
+    """
+    Computes the time the player can spend on the current move, given the config keys
+    'move_time' (the max seconds per move) and 'game_time' (the seconds each player has for the whole game).
+    The remaining game time is split on the moves the player is expected to play, estimated from the empty cells.
+
+    :param game: the game object
+    :param config: the game config
+    :param player: 1 (AI1) or -1 (AI2)
+    :return: the seconds for the move, or None if there is no time limit
+    """
+    budgets = []
+    if _ai_config(config, player, 'move_time') is not None:
+        budgets.append(_ai_config(config, player, 'move_time'))
+    if _ai_config(config, player, 'game_time') is not None:
+        remaining_time = _ai_config(config, player, 'game_time') - \
+            config.get(('AI1_' if player == 1 else 'AI2_') + 'time_used', 0)
+        # games usually end when about half the board is filled, half of those moves by the player
+        expected_moves = max(1, game.num_available_moves() // 4)
+        budgets.append(max(0, remaining_time) / expected_moves)
+    return min(budgets) if budgets else None
+
+
+# the config keys where search_move keeps the state of the searches of each player between the moves
+SEARCH_STATE_KEYS = [prefix + key for prefix in ['AI1_', 'AI2_']
+                     for key in ['search_table', 'search_pool', 'searched_moves']]
+
+
+def search_move(game, config, time_budget=None, stop_event=None, callback=None):
+    """
+    Searches the move of the computer for the current turn player, according the config.
+
+    :param game: the game object
+    :param config: the game config
+    :param time_budget: the seconds the search can take, or None
+    :param stop_event: a threading.Event which stops the search when set, or None
+    :param callback: if not None, the search deepens iteratively and callback is called with the value,
+                     the move and the depth of each completed iteration (see iterative_deepening)
+    :return: the move to play, None if the search was stopped before finding one
+    """
+    start_time = time.time()
+    player = game.player_turn
+    # the opening positions are looked up in the book
+    opening_book = _ai_config(config, player, 'opening_book')
+    if opening_book is not None:
+        move = opening_book.lookup(game)
+        if move is not None:
+            return move
+    # if this is the first move and there is no book move uses the central cell as opening move
+    if game.num_available_moves() == config['board_size'] ** 2:
+        return config['board_size'] // 2, config['board_size'] // 2
+    node_value_heuristic = _ai_config(config, player, 'node_value_heuristic')
+    node_ordering_heuristic = _ai_config(config, player, 'node_ordering_heuristic')
+    transposition_table = _ai_config(config, player, 'transposition_table')
+    max_depth = _ai_config(config, player, 'max_depth', math.inf)
+    search = _ai_config(config, player, 'search', alpha_beta_pruning)
+    aspiration_window = _ai_config(config, player, 'aspiration_window')
+    virtual_connections = _ai_config(config, player, 'virtual_connections')
+    inferior_cells = _ai_config(config, player, 'inferior_cells')
+    # a new game has fewer moves than the last position searched by the player (the book and the opening
+    # moves are not searched, so the first search of a game can be at any number of moves)
+    prefix = 'AI1_' if player == 1 else 'AI2_'
+    new_game = len(game.history) < config.get(prefix + 'searched_moves', math.inf)
+    config[prefix + 'searched_moves'] = len(game.history)
+    # the table of the previous searches of the player is kept with the value heuristic whose values it holds,
+    # it is renewed when the heuristic changes and with each game
+    if _ai_config(config, player, 'reuse_search', False) and transposition_table is None:
+        table_heuristic, transposition_table = config.get(prefix + 'search_table', (None, None))
+        if table_heuristic is not node_value_heuristic or new_game:
+            transposition_table = TranspositionTable(_ai_config(config, player, 'table_bytes', 16 * 2 ** 20))
+        config[prefix + 'search_table'] = (node_value_heuristic, transposition_table)
+    # the entries and the move statistics of the previous searches get older, the ones of the previous
+    # games are forgotten
+    if transposition_table is not None:
+        transposition_table.new_search()
+    if new_game:
+        node_ordering_heuristic.new_game()
+    node_ordering_heuristic.new_search()
+    # the root moves are split on a pool of processes, kept between the searches of the player
+    # until the search function or the heuristics change
+    workers = _ai_config(config, player, 'workers', 1)
+    if workers > 1 and not isinstance(search, mcts.MCTS):
+        pool_key = prefix + 'search_pool'
+        pool = config.get(pool_key)
+        if pool is None or not pool.matches(workers, search, node_value_heuristic, node_ordering_heuristic,
+                                            virtual_connections, inferior_cells):
+            if pool is not None:
+                pool.shutdown()
+            pool = config[pool_key] = parallel_search.SearchPool(workers, search, node_value_heuristic,
+                                                                 node_ordering_heuristic, virtual_connections,
+                                                                 inferior_cells)
+        search = functools.partial(parallel_search.parallel_alpha_beta_pruning, pool=pool)
+    maximize = (player == 1)
+    deadline = start_time + time_budget if time_budget is not None else None
+    n_moves = len(game.history)
+    stats = _ai_config(config, player, 'search_stats')
+    if stats is not None:
+        stats.start_move(game, transposition_table)
+    depth = max_depth
+    try:
+        if isinstance(search, mcts.MCTS):
+            # the Monte Carlo search is not depth limited, it just stops at the deadline
+            _, move = search(game, maximize, deadline=deadline, stop_event=stop_event)
+        elif time_budget is None and aspiration_window is None and callback is None:
+            _, move = search(game, maximize, max_depth=max_depth,
+                             node_value_heuristic=node_value_heuristic,
+                             node_ordering_heuristic=node_ordering_heuristic,
+                             transposition_table=transposition_table,
+                             stop_event=stop_event,
+                             virtual_connections=virtual_connections,
+                             inferior_cells=inferior_cells,
+                             stats=stats)
+        else:
+            _, move, depth = iterative_deepening(game, maximize, max_depth=max_depth,
+                                             deadline=deadline,
+                                             node_value_heuristic=node_value_heuristic,
+                                             node_ordering_heuristic=node_ordering_heuristic,
+                                             transposition_table=transposition_table,
+                                             search=search,
+                                             aspiration_window=aspiration_window,
+                                             stop_event=stop_event,
+                                             virtual_connections=virtual_connections,
+                                             inferior_cells=inferior_cells,
+                                             stats=stats,
+                                             callback=callback)
+    except SearchTimeout:
+        # the search was stopped, undo its moves
+        while len(game.history) > n_moves:
+            game.unmake_move()
+        return None
+    if stats is not None:
+        stats.end_move(move, None if isinstance(search, mcts.MCTS) or math.isinf(depth) else depth)
+    return move
+
+
+def best_move(game, config, time_budget=None):
+    """
+    Computes the move of the computer for the current turn player, adding its time to the game clock.
+    If a ponderer already searched the current position its reply is played.
+
+    :param game: the game object
+    :param config: the game config
+    :param time_budget: the seconds the search can take, if None the ones given by move_time_budget
+    :return: the move to play
+    """
+    start_time = time.time()
+    player = game.player_turn
+    time_used_key = ('AI1_' if player == 1 else 'AI2_') + 'time_used'
+    # the game clock restarts with the first move of the player
+    if len(game.history) < 2:
+        config[time_used_key] = 0
+    move = None
+    if config.get('ponderer') is not None:
+        move = config['ponderer'].reply(game)
+    if move is None:
+        if time_budget is None:
+            time_budget = move_time_budget(game, config, player)
+        move = search_move(game, config, time_budget)
+    config[time_used_key] = config.get(time_used_key, 0) + time.time() - start_time
+    return move
+
+
+class Ponderer:
+    """
+    Searches the computer replies in a background thread during the opponent turn.
+    The expected opponent move is searched first, then all the others, and when the opponent
+    moves the reply found for that move (if any) is played by best_move immediately.
+    To use it, put it in config['ponderer'], start it when the opponent turn starts and stop it when it ends.
+    """
+
+    def __init__(self, config):
+        """
+        :param config: the game config
+        """
+        self.config = config
+        self.thread = None
+        self.stop_event = threading.Event()
+        # the position the pondering started from and the replies found for each opponent move
+        self.history = None
+        self.replies = dict()
+
+    def start(self, game):
+        """
+        Starts pondering on a copy of game, in the opponent turn.
+
+        :param game: the game object
+        """
+        self.stop()
+        self.history = list(game.history)
+        self.replies = dict()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._ponder, args=(deepcopy(game),), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops pondering, the search in progress is discarded.
+        """
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def reply(self, game):
+        """
+        :param game: the game object
+        :return: the reply found for the last move of game, None if it was not searched
+        """
+        if self.history is None or game.history[:-1] != self.history:
+            return None
+        return self.replies.get(game.history[-1])
+
+    def _ponder(self, game):
+        """
+        Searches the reply to each opponent move, until stopped.
+
+        :param game: the game object, in the opponent turn
+        """
+        if game.check_game() is not None:
+            return
+        computer = -game.player_turn
+        node_value_heuristic = _ai_config(self.config, computer, 'node_value_heuristic')
+        node_ordering_heuristic = _ai_config(self.config, computer, 'node_ordering_heuristic')
+        # the expected opponent move is the best one according the computer value heuristic
+        try:
+            _, expected_move = alpha_beta_pruning(game, game.player_turn == 1, max_depth=1,
+                                                  node_value_heuristic=node_value_heuristic,
+                                                  node_ordering_heuristic=node_ordering_heuristic,
+                                                  stop_event=self.stop_event)
+        except SearchTimeout:
+            return
+        moves = node_ordering_heuristic.sort(game, game.available_moves())
+        moves.remove(expected_move)
+        moves.insert(0, expected_move)
+        # the pondered searches are not played moves, so they are not recorded in the search statistics
+        config = {key: value for key, value in self.config.items() if not key.endswith('search_stats')}
+        for move in moves:
+            game.make_move(move)
+            if game.check_game() is None:
+                reply = search_move(game, config, move_time_budget(game, config, computer), self.stop_event)
+                # the table and the pool made by search_move on the copy of the config are kept
+                for key in SEARCH_STATE_KEYS:
+                    if key in config:
+                        self.config[key] = config[key]
+                if self.stop_event.is_set():
+                    return
+                self.replies[move] = reply
+            game.unmake_move()
+
+
 def computer_turn(game, ui, config):
     """
     Plays a move from the computer.
@@ -121,18 +822,7 @@ def computer_turn(game, ui, config):
     """
     # compute the best move
     player = game.player_turn
-    # if this is the first move uses the central cell as opening move
-    if len(game.available_moves()) == config['board_size'] ** 2:
-        move = (config['board_size'] // 2, config['board_size'] // 2)
-    else:
-        node_value_heuristic = config['AI1_node_value_heuristic'] if (player == ui.BLUE_PLAYER) else config[
-            'AI2_node_value_heuristic']
-        node_ordering_heuristic = config['AI1_node_ordering_heuristic'] if (player == ui.BLUE_PLAYER) else config[
-            'AI2_node_ordering_heuristic']
-        maximize = (player == ui.BLUE_PLAYER)
-        _, move = alpha_beta_pruning(game, maximize, max_depth=config['max_depth'],
-                                            node_value_heuristic=node_value_heuristic,
-                                            node_ordering_heuristic=node_ordering_heuristic)
+    move = best_move(game, config)
     # plays the move
     game.play_move(move)
     # updates the ui
@@ -149,19 +839,6 @@ def computer_turn_testing(game, config):
     :param config: the game config
     """
     # compute the best move
-    player = game.player_turn
-    # if this is the first move uses the central cell as opening move
-    if len(game.available_moves()) == config['board_size'] ** 2:
-        move = (config['board_size'] // 2, config['board_size'] // 2)
-    else:
-        node_value_heuristic = config['AI1_node_value_heuristic'] if (player == 1) else config[
-            'AI2_node_value_heuristic']
-        node_ordering_heuristic = config['AI1_node_ordering_heuristic'] if (player == 1) else config[
-            'AI2_node_ordering_heuristic']
-        max_depth = config['AI1_max_depth'] if (player == 1) else config['AI2_max_depth']
-        maximize = (player == 1)
-        _, move = alpha_beta_pruning(game, maximize, max_depth=max_depth,
-                                            node_value_heuristic=node_value_heuristic,
-                                            node_ordering_heuristic=node_ordering_heuristic)
+    move = best_move(game, config)
     # plays the move
     game.play_move(move)
@@ -0,0 +1,317 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the virtual connections engine (H-search)
+
+"""
+
+
+class Connections:
+    """
+    The virtual connections (VCs) and the semi connections (SCs) of a player in a position.
+    The nodes are the empty cells (numbered r * n + c), the groups of stones of the player
+    (numbered as their smallest cell) and the two edges of the player (numbered n * n and n * n + 1),
+    a group touching an edge is part of the edge node.
+    A carrier is the bitmask of the empty cells a connection needs, the cell r * n + c is the bit r * n + c.
+    """
+
+    def __init__(self):
+        # for each pair of nodes (a, b) with a < b the carriers of its VCs
+        self.vcs = dict()
+        # for each pair of nodes (a, b) with a < b the carriers and the keys of its SCs
+        self.scs = dict()
+        # for each node the nodes it has a VC with
+        self.partners = dict()
+
+
+class HSearch:
+    """
+    Computes the virtual connections of the two players with the H-search algorithm
+    (Anshelevich, A hierarchical approach to computer Hex):
+     - two adjacent nodes are virtually connected with an empty carrier;
+     - AND rule: the VCs x-z and z-y with disjoint carriers, not containing x and y, give a VC x-y
+       if z is a group of stones, else a SC x-y with key z;
+     - OR rule: SCs x-y whose carriers have an empty intersection give a VC x-y.
+    A VC between the two edges of a player is a proven win, a SC is a proven win if the player is in turn.
+    When the opponent has SCs between its edges the player must play in the intersection of their carriers.
+
+    The connections of each position of the game history are kept, like the ChargeHeuristic states,
+    and the ones of a new position are updated from the previous position: the opponent of the player
+    who moved just loses the connections using the played cell, while the connections of the player
+    who moved are joined by the new stone and only the ones touching it are combined again.
+    """
+
+    def __init__(self, n, max_vcs=4, max_scs=8):
+        """
+        :param n: the dimension of the board
+        :param max_vcs: the max number of VCs kept for each pair of nodes
+        :param max_scs: the max number of SCs kept for each pair of nodes
+        """
+        self.n = n
+        self.max_vcs = max_vcs
+        self.max_scs = max_scs
+        # the two edge nodes
+        self.edge_1 = n * n
+        self.edge_2 = n * n + 1
+        self.neighbors = []
+        for r in range(n):
+            for c in range(n):
+                self.neighbors.append([(r + dr) * n + c + dc for dr, dc in [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+                                       if 0 <= r + dr < n and 0 <= c + dc < n])
+        # for each player the edge node touched by each cell, or None
+        self.edges = {1: [n * n if c == 0 else n * n + 1 if c == n - 1 else None for r in range(n) for c in range(n)],
+                      -1: [n * n if r == 0 else n * n + 1 if r == n - 1 else None for r in range(n) for c in range(n)]}
+        # the moves and the connections of the positions analyzed, the first position is the one of base_history
+        self.base_history = None
+        self.moves = []
+        self.states = []
+
+    def analyze(self, game):
+        """
+        :param game: the game object, in a position which is not ended
+        :return: the proven winner of the position (or None), and the bitmask of the cells
+                 the current turn player must play in (or None if any cell can be played)
+        """
+        state = self._state(game)
+        player, opponent = game.player_turn, -game.player_turn
+        edges = (self.edge_1, self.edge_2)
+        # the player connects the edges, with a move if needed
+        if edges in state[player].vcs or edges in state[player].scs:
+            return player, None
+        if edges in state[opponent].vcs:
+            return opponent, None
+        opponent_scs = state[opponent].scs.get(edges)
+        if not opponent_scs:
+            return None, None
+        # any move outside the carrier of a SC lets the opponent complete it
+        must_play = (1 << self.n * self.n) - 1
+        for carrier, _ in opponent_scs:
+            must_play &= carrier
+        if not must_play:
+            return opponent, None
+        return None, must_play
+
+    def _state(self, game):
+        """
+        :param game: the game object
+        :return: the connections of the two players in the current position
+        """
+        # the moves are kept with their player, the history of the game has no colors and the same moves
+        # give different positions in the games started by the two players
+        history = [(r, c, game.grid[r][c]) for r, c in game.history]
+        base_length = len(self.base_history) if self.base_history is not None else 0
+        same_moves = -1
+        if self.base_history is not None and len(history) >= base_length and \
+                history[:base_length] == self.base_history:
+            # the positions already analyzed
+            same_moves = 0
+            for move, state_move in zip(history[base_length:], self.moves):
+                if move != state_move:
+                    break
+                same_moves += 1
+        # the position is updated only from the previous one, else it is computed again
+        if same_moves < 0 or len(history) > base_length + same_moves + 1:
+            self.base_history = history
+            self.moves = []
+            self.states = [self._from_scratch(game)]
+            return self.states[0]
+        del self.moves[same_moves:]
+        del self.states[same_moves + 1:]
+        if len(history) > base_length + same_moves:
+            self.states.append(self._play(self.states[-1], game, game.history[-1]))
+            self.moves.append(history[-1])
+        return self.states[-1]
+
+    def _nodes(self, game, player):
+        """
+        :param game: the game object
+        :param player: 1 or -1
+        :return: the node of each cell (None for the opponent stones) and the bitmask of the empty cells
+        """
+        n = self.n
+        grid = game.grid
+        node_of = [None] * (n * n)
+        empty = 0
+        for cell in range(n * n):
+            if grid[cell // n][cell % n] == 0:
+                node_of[cell] = cell
+                empty |= 1 << cell
+        for cell in range(n * n):
+            if grid[cell // n][cell % n] != player or node_of[cell] is not None:
+                continue
+            # the group of the stone
+            group, stack = [cell], [cell]
+            node_of[cell] = cell
+            while stack:
+                for neighbor in self.neighbors[stack.pop()]:
+                    if node_of[neighbor] is None and grid[neighbor // n][neighbor % n] == player:
+                        node_of[neighbor] = cell
+                        group.append(neighbor)
+                        stack.append(neighbor)
+            edges = [self.edges[player][stone] for stone in group if self.edges[player][stone] is not None]
+            node = min(edges) if edges else cell
+            for stone in group:
+                node_of[stone] = node
+        return node_of, empty
+
+    def _from_scratch(self, game):
+        """
+        :param game: the game object
+        :return: the connections of the two players in the current position, computed from the adjacencies
+        """
+        state = dict()
+        for player in [1, -1]:
+            node_of, empty = self._nodes(game, player)
+            connections = Connections()
+            worklist = []
+            for cell in range(self.n * self.n):
+                if not empty >> cell & 1:
+                    continue
+                if self.edges[player][cell] is not None:
+                    self._add_vc(connections, cell, self.edges[player][cell], 0, worklist)
+                for neighbor in self.neighbors[cell]:
+                    if node_of[neighbor] is not None:
+                        self._add_vc(connections, cell, node_of[neighbor], 0, worklist)
+            self._combine(connections, empty, worklist)
+            state[player] = connections
+        return state
+
+    def _play(self, state, game, move):
+        """
+        :param state: the connections of the position before move
+        :param game: the game object, move is in its history
+        :param move: the move played
+        :return: the connections of the position after move
+        """
+        cell = move[0] * self.n + move[1]
+        cell_bit = 1 << cell
+        player = game.grid[move[0]][move[1]]
+        new_state = dict()
+        # the opponent loses the connections through the cell
+        opponent_connections = state[-player]
+        connections = Connections()
+        for pair, carriers in opponent_connections.vcs.items():
+            if cell not in pair:
+                kept = [carrier for carrier in carriers if not carrier & cell_bit]
+                if kept:
+                    connections.vcs[pair] = kept
+                    connections.partners.setdefault(pair[0], set()).add(pair[1])
+                    connections.partners.setdefault(pair[1], set()).add(pair[0])
+        for pair, scs in opponent_connections.scs.items():
+            if cell not in pair:
+                kept = [sc for sc in scs if not sc[0] & cell_bit]
+                if kept:
+                    connections.scs[pair] = kept
+        new_state[-player] = connections
+        # the player joins the cell to the adjacent groups, its connections are still valid without the cell
+        node_of, empty = self._nodes(game, player)
+        group = node_of[cell]
+
+        def renamed(node):
+            return node if node >= self.n * self.n else node_of[node]
+
+        connections = Connections()
+        worklist = []
+        for (a, b), carriers in state[player].vcs.items():
+            a, b = renamed(a), renamed(b)
+            if a != b:
+                for carrier in carriers:
+                    self._add_vc(connections, a, b, carrier & ~cell_bit,
+                                 worklist if group in (a, b) or carrier & cell_bit else None)
+        for (a, b), scs in state[player].scs.items():
+            a, b = renamed(a), renamed(b)
+            if a != b:
+                for carrier, key in scs:
+                    # the player played the key of the SC
+                    if key == cell:
+                        self._add_vc(connections, a, b, carrier & ~cell_bit, worklist)
+                    else:
+                        self._add_sc(connections, a, b, carrier & ~cell_bit, key, worklist)
+        self._combine(connections, empty, worklist)
+        new_state[player] = connections
+        return new_state
+
+    def _add_vc(self, connections, a, b, carrier, worklist):
+        """
+        Adds a VC, unless a VC with a smaller carrier is known, and adds it to the worklist (if not None).
+        """
+        pair = (a, b) if a < b else (b, a)
+        carriers = connections.vcs.get(pair)
+        if carriers is None:
+            carriers = connections.vcs[pair] = []
+            connections.partners.setdefault(a, set()).add(b)
+            connections.partners.setdefault(b, set()).add(a)
+        for known in carriers:
+            if known & carrier == known:
+                return
+        carriers[:] = [known for known in carriers if known & carrier != carrier]
+        if len(carriers) >= self.max_vcs:
+            return
+        carriers.append(carrier)
+        if worklist is not None:
+            worklist.append((pair, carrier))
+
+    def _add_sc(self, connections, a, b, carrier, key, worklist):
+        """
+        Adds a SC, unless a connection with a smaller carrier is known, and applies the OR rule.
+        """
+        pair = (a, b) if a < b else (b, a)
+        for known in connections.vcs.get(pair, ()):
+            if known & carrier == known:
+                return
+        scs = connections.scs.setdefault(pair, [])
+        for known, _ in scs:
+            if known & carrier == known:
+                return
+        scs[:] = [(known, known_key) for known, known_key in scs if known & carrier != carrier]
+        if len(scs) >= self.max_scs:
+            return
+        # OR rule: the SCs which reduce the intersection of the carriers are joined
+        union, intersection = carrier, carrier
+        for known, _ in scs:
+            if intersection & known != intersection:
+                union |= known
+                intersection &= known
+                if not intersection:
+                    self._add_vc(connections, a, b, union, worklist)
+                    return
+        scs.append((carrier, key))
+
+    def _combine(self, connections, empty, worklist):
+        """
+        Applies the AND rule to the VCs of the worklist, until no new connection is found.
+
+        :param connections: the Connections of a player
+        :param empty: the bitmask of the empty cells
+        :param worklist: the new VCs, as (pair, carrier)
+        """
+        n_cells = self.n * self.n
+        edges = (self.edge_1, self.edge_2)
+        while worklist and edges not in connections.vcs:
+            (a, b), carrier_1 = worklist.pop()
+            if carrier_1 not in connections.vcs.get((a, b), ()):
+                continue
+            for middle, x in [(a, b), (b, a)]:
+                # the edges are not used as middle nodes
+                if middle >= n_cells:
+                    continue
+                middle_is_empty = empty >> middle & 1
+                x_bit = 1 << x if x < n_cells and empty >> x & 1 else 0
+                for y in list(connections.partners.get(middle, ())):
+                    if y == x:
+                        continue
+                    y_bit = 1 << y if y < n_cells and empty >> y & 1 else 0
+                    if y_bit & carrier_1:
+                        continue
+                    for carrier_2 in list(connections.vcs.get((middle, y) if middle < y else (y, middle), ())):
+                        if carrier_1 & carrier_2 or x_bit & carrier_2:
+                            continue
+                        if middle_is_empty:
+                            self._add_sc(connections, x, y, carrier_1 | carrier_2 | 1 << middle, middle, worklist)
+                        else:
+                            self._add_vc(connections, x, y, carrier_1 | carrier_2, worklist)
@@ -0,0 +1,178 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the inferior cells analysis (dead and captured cells)
+
+"""
+from itertools import product
+
+# the six neighbors of a cell, in order around the cell
+RING = [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+# the state of a cell in a pattern: empty, a stone (or the edge) of player 1 or of player -1
+STATES = {0: 0, 1: 1, -1: 2}
+
+
+def _useless(ring, player):
+    """
+    A stone of player on the cell is useless to player if any two of the neighbors a chain of player
+    can go through (the ones which are not of the opponent) are joined around the cell by the stones
+    of player, so every chain through the cell can go around it.
+
+    :param ring: the states of the six neighbors, in order around the cell
+    :param player: 1 or -1
+    :return: True if the cell is useless to player
+    """
+    own, opponent = STATES[player], STATES[-player]
+    passable = [i for i in range(6) if ring[i] != opponent]
+    for a in passable:
+        for b in passable:
+            if a >= b:
+                continue
+            # the two ways around the cell from a to b
+            clockwise = all(ring[i % 6] == own for i in range(a + 1, b))
+            counterclockwise = all(ring[i % 6] == own for i in range(b + 1, a + 6))
+            if not clockwise and not counterclockwise:
+                return False
+    return True
+
+
+def _patterns():
+    """
+    :return: the pattern table, for each code of the six neighbors (sum of state_i * 3^i)
+             the bit 1 if the cell is useless to player 1 and the bit 2 if it is useless to player -1
+    """
+    table = bytearray(3 ** 6)
+    for ring in product(range(3), repeat=6):
+        code = sum(state * 3 ** i for i, state in enumerate(ring))
+        table[code] = _useless(ring, 1) | _useless(ring, -1) << 1
+    return table
+
+
+# the precompiled pattern table, a cell is dead if both the bits are set
+PATTERNS = _patterns()
+DEAD = 3
+
+
+class InferiorCells:
+    """
+    Finds the inferior cells of a position, with a pattern table matched on the neighbors of each cell
+    (the cells outside the board count as the player of their edge, the ones beyond two edges as empty):
+     - a cell is dead if a stone on it is useless to both the players, so its color does not change the winner
+       and playing it is like passing;
+     - two adjacent empty cells are captured by a player if a stone of the player on any of them makes
+       the other one dead: the player answers the opponent in the pair, so the pair can be filled with its stones.
+    Playing a dead or a captured cell is never better than playing another cell, so the search can skip them.
+    With fill_in, a player who is connected after filling the captured cells (and the dead ones) has a proven win.
+    """
+
+    def __init__(self, n, fill_in=True):
+        """
+        :param n: the dimension of the board
+        :param fill_in: True to detect the wins on the board with the inferior cells filled
+        """
+        self.n = n
+        self.fill_in = fill_in
+        # for each cell its six neighbors, as cell index or as fixed state if outside the board
+        self.rings = []
+        for r in range(n):
+            for c in range(n):
+                ring = []
+                for dr, dc in RING:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < n and 0 <= nc < n:
+                        ring.append(nr * n + nc)
+                    elif 0 <= nr < n:
+                        ring.append(-STATES[1] - 1)
+                    elif 0 <= nc < n:
+                        ring.append(-STATES[-1] - 1)
+                    else:
+                        ring.append(-STATES[0] - 1)
+                self.rings.append(ring)
+        self.neighbors = [[cell for cell in ring if cell >= 0] for ring in self.rings]
+
+    def _code(self, states, cell):
+        """
+        :param states: the state of each cell of the board
+        :param cell: a cell index
+        :return: the pattern code of the neighbors of cell
+        """
+        code = 0
+        power = 1
+        for neighbor in self.rings[cell]:
+            code += (states[neighbor] if neighbor >= 0 else -neighbor - 1) * power
+            power *= 3
+        return code
+
+    def analyze(self, game):
+        """
+        :param game: the game object
+        :return: the proven winner (None if not proven or without fill_in) and the bitmask of the inferior cells,
+                 the cell r * n + c is the bit r * n + c
+        """
+        n = self.n
+        states = [STATES[value] for row in game.grid for value in row]
+        dead, captured = 0, {1: 0, -1: 0}
+        # one sweep of the board: the dead cells, then the captured pairs around the empty cells
+        for cell in range(n * n):
+            if states[cell] != 0:
+                continue
+            if PATTERNS[self._code(states, cell)] == DEAD:
+                dead |= 1 << cell
+                continue
+            for neighbor in self.neighbors[cell]:
+                if states[neighbor] != 0 or dead >> neighbor & 1:
+                    continue
+                for player in [1, -1]:
+                    # a stone of player on each cell of the pair makes the other one dead
+                    states[cell] = STATES[player]
+                    captured_pair = PATTERNS[self._code(states, neighbor)] == DEAD
+                    states[cell] = 0
+                    if captured_pair:
+                        states[neighbor] = STATES[player]
+                        captured_pair = PATTERNS[self._code(states, cell)] == DEAD
+                        states[neighbor] = 0
+                    if captured_pair:
+                        # the pair is filled, the next patterns see its stones
+                        states[cell] = states[neighbor] = STATES[player]
+                        captured[player] |= 1 << cell | 1 << neighbor
+                        break
+                if states[cell] != 0:
+                    break
+        winner = None
+        if self.fill_in and (captured[1] or captured[-1] or dead):
+            for player in [1, -1]:
+                if self._connected(states, dead, player):
+                    winner = player
+                    break
+        return winner, dead | captured[1] | captured[-1]
+
+    def _connected(self, states, dead, player):
+        """
+        :param states: the state of each cell of the board, with the captured cells filled
+        :param dead: the bitmask of the dead cells, filled with the stones of player
+        :param player: 1 or -1
+        :return: True if player connects its edges
+        """
+        n = self.n
+        own = STATES[player]
+
+        def is_own(cell):
+            return states[cell] == own or dead >> cell & 1
+
+        start = [r * n for r in range(n)] if player == 1 else list(range(n))
+        stack = [cell for cell in start if is_own(cell)]
+        reached = set(stack)
+        while stack:
+            cell = stack.pop()
+            if (player == 1 and cell % n == n - 1) or (player == -1 and cell // n == n - 1):
+                return True
+            for neighbor in self.neighbors[cell]:
+                if neighbor not in reached and is_own(neighbor):
+                    reached.add(neighbor)
+                    stack.append(neighbor)
+        return False
@@ -54,6 +54,8 @@ def user_turn(game, ui, config):
                             # getting the move
                             move = ui.get_true_coordinates(_)
                             break
+            # leaves the cpu to the pondering search
+            pygame.time.wait(10)
         moved = game.play_move(move)
         if moved:
             # updates the ui
@@ -63,6 +65,21 @@ def user_turn(game, ui, config):
             break
 
 
+def pondering_user_turn(game, ui, config):
+    """
+    Plays a move from the user, while the computer ponders its replies.
+
+    :param game: the game object
+    :param ui: the game ui object
+    :param config: the game config
+    """
+    config['ponderer'].start(game)
+    try:
+        user_turn(game, ui, config)
+    finally:
+        config['ponderer'].stop()
+
+
 # the game configs
 board_size = 11
 config = {
@@ -75,6 +92,8 @@ config = {
     'AI2_node_ordering_heuristic': heuristics.RandomOrderHeuristic(),
     'starting_player': -1
 }
+if config.get('ponder') and not config['AI_vs_AI']:
+    config['ponderer'] = hex_AI.Ponderer(config)
 
 
 def main():
@@ -92,9 +111,10 @@ def main():
         # inti the ui
         ui = UI(config['board_size'])
         player_turn = {ui.BLUE_PLAYER: hex_AI.computer_turn, ui.RED_PLAYER: hex_AI.computer_turn} if config['AI_vs_AI'] \
-            else {ui.BLUE_PLAYER: hex_AI.computer_turn, ui.RED_PLAYER: user_turn}
+            else {ui.BLUE_PLAYER: hex_AI.computer_turn,
+                  ui.RED_PLAYER: pondering_user_turn if 'ponderer' in config else user_turn}
         # init the game
-        hex = Hex(config['board_size'], starting_player=config['starting_player'])
+        hex = config.get('game_class', Hex)(config['board_size'], starting_player=config['starting_player'])
         print('Player', config['starting_player'],
               '\033[34m●\033[0m' if config['starting_player'] == ui.BLUE_PLAYER else '\033[31m●\033[0m', 'starts!')
         # draws the terminal and gui
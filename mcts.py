@@ -0,0 +1,297 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the Monte Carlo Tree Search engine
+
+"""
+import math
+import random
+import time
+from collections import deque
+import numpy as np
+from heuristics import ValueHeuristic, OrderHeuristic
+from playouts import batch_playouts
+
+
+class MCTS:
+    """
+    A Monte Carlo Tree Search (UCT) engine.
+    Hex has no draws and a full board always has exactly one winner, so a playout just fills
+    the empty cells at random and checks the game once.
+
+    The tree is stored in parallel lists indexed by node: the move leading to the node, its parent,
+    the index of its first child (the children of a node are contiguous), the number of children,
+    the visits and the wins of the player who played the move.
+
+    It can be used as search in the game config, in place of alpha_beta_pruning.
+    With reuse_tree the tree is kept between the searches: the next search starts from the subtree
+    of the moves played since the previous one, and the rest of the tree is dropped.
+    """
+
+    def __init__(self, exploration=math.sqrt(2), playouts=1000, move_time=None,
+                 prior_heuristic=None, prior_visits=10, prior_scale=0.5, batch_size=None, seed=None,
+                 reuse_tree=False, max_nodes=10 ** 6):
+        """
+        :param exploration: the exploration constant of UCT
+        :param playouts: the number of playouts per search, None for no limit
+        :param move_time: the max seconds per search, None for no limit
+        :param prior_heuristic: a ValueHeuristic or an OrderHeuristic used to initialize the new nodes, or None
+        :param prior_visits: the number of virtual visits of the prior
+        :param prior_scale: the scale of the sigmoid which turns the values of a ValueHeuristic in win rates
+        :param batch_size: if not None, each simulation runs batch_size vectorized playouts and backs up
+                           the fraction of wins
+        :param seed: the seed of the playouts, None for a random one
+        :param reuse_tree: True to keep the subtree of the played moves between the searches
+        :param max_nodes: the max number of nodes of the tree, then the leaves are not expanded anymore
+        """
+        self.exploration = exploration
+        self.playouts = playouts
+        self.move_time = move_time
+        self.prior_heuristic = prior_heuristic
+        self.prior_visits = prior_visits
+        self.prior_scale = prior_scale
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.reuse_tree = reuse_tree
+        self.max_nodes = max_nodes
+        # the position of the root
+        self.root_history = None
+        self._clear()
+
+    def _clear(self):
+        """
+        Empties the tree, leaving only the root node.
+        """
+        self.move = [None]
+        self.parent = [-1]
+        self.first_child = [0]
+        self.n_children = [0]
+        self.visits = [0]
+        self.wins = [0.0]
+
+    def __len__(self):
+        return len(self.move)
+
+    def __call__(self, game, maximize, deadline=None, stop_event=None, **kwargs):
+        """
+        Searches the best move for the current turn player, with the same interface of alpha_beta_pruning.
+        The other search parameters (max_depth, heuristics, ...) are ignored.
+
+        :param game: the game object
+        :param maximize: True if first player wants to maximize the value
+        :param deadline: the time.time() when the search must stop, or None
+        :param stop_event: a threading.Event which stops the search when set, or None
+        :return: the value (the win rate of the best move, from -1 to 1 for the first player) and the best move
+        """
+        return self.search(game, deadline=deadline, stop_event=stop_event)
+
+    def search(self, game, deadline=None, stop_event=None):
+        """
+        Runs the playouts from the current position of game.
+
+        :param game: the game object
+        :param deadline: the time.time() when the search must stop, or None
+        :param stop_event: a threading.Event which stops the search when set, or None
+        :return: the value (the win rate of the best move, from -1 to 1 for the first player) and the best move
+        """
+        winner = game.check_game()
+        if winner is not None:
+            return winner * float('inf'), None
+        if self.reuse_tree:
+            self.advance(game)
+        else:
+            self._clear()
+        self.root_history = list(game.history)
+        if self.move_time is not None:
+            deadline = min(deadline, time.time() + self.move_time) if deadline is not None else time.time() + self.move_time
+        i = 0
+        while (self.playouts is None or i < self.playouts) and (deadline is None or time.time() < deadline):
+            if stop_event is not None and stop_event.is_set():
+                break
+            self._playout(game)
+            i += 1
+            # at least a playout without limits
+            if self.playouts is None and deadline is None:
+                break
+        return self.best(game)
+
+    def advance(self, game):
+        """
+        Moves the root of the tree to the current position of game, following the moves played
+        from the position of the previous root. If it is not reachable the tree is emptied.
+
+        :param game: the game object
+        """
+        if self.root_history is None or game.history[:len(self.root_history)] != self.root_history:
+            self._clear()
+            self.root_history = list(game.history)
+            return
+        node = 0
+        for move in game.history[len(self.root_history):]:
+            first = self.first_child[node]
+            children = [child for child in range(first, first + self.n_children[node]) if self.move[child] == move]
+            if not children:
+                self._clear()
+                self.root_history = list(game.history)
+                return
+            node = children[0]
+        if node != 0:
+            self._reroot(node)
+        self.root_history = list(game.history)
+
+    def _reroot(self, root):
+        """
+        Rebuilds the tree with only the subtree of root, which becomes the new root node.
+        """
+        move, first_child, n_children, visits, wins = self.move, self.first_child, self.n_children, self.visits, self.wins
+        self._clear()
+        self.visits[0] = visits[root]
+        self.wins[0] = wins[root]
+        # breadth first, so the children of each node stay contiguous
+        queue = deque([(root, 0)])
+        while queue:
+            old_node, node = queue.popleft()
+            if n_children[old_node] == 0:
+                continue
+            first = first_child[old_node]
+            self.first_child[node] = len(self.move)
+            self.n_children[node] = n_children[old_node]
+            for child in range(first, first + n_children[old_node]):
+                queue.append((child, len(self.move)))
+                self.move.append(move[child])
+                self.parent.append(node)
+                self.first_child.append(0)
+                self.n_children.append(0)
+                self.visits.append(visits[child])
+                self.wins.append(wins[child])
+
+    def best(self, game):
+        """
+        :param game: the game object, in the position of the root
+        :return: the value and the most visited move of the root
+        """
+        self._expand(0, game)
+        first = self.first_child[0]
+        best_child = max(range(first, first + self.n_children[0]), key=lambda child: self.visits[child])
+        win_rate = self.wins[best_child] / self.visits[best_child] if self.visits[best_child] else 0.5
+        return (2 * win_rate - 1) * game.player_turn, self.move[best_child]
+
+    def _select(self, node):
+        """
+        :param node: an expanded node
+        :return: the child of node with the best UCT value
+        """
+        first = self.first_child[node]
+        log_visits = math.log(max(1, self.visits[node]))
+        best_child, best_value = first, -1.0
+        for child in range(first, first + self.n_children[node]):
+            visits = self.visits[child]
+            # the not visited children first
+            if visits == 0:
+                return child
+            value = self.wins[child] / visits + self.exploration * math.sqrt(log_visits / visits)
+            if value > best_value:
+                best_child, best_value = child, value
+        return best_child
+
+    def _expand(self, node, game):
+        """
+        Adds the children of node, the position of game, if not added yet.
+        """
+        if self.n_children[node] > 0:
+            return
+        moves = game.available_moves()
+        # the root is always expanded, to have a move to return
+        if node != 0 and len(self.move) + len(moves) > self.max_nodes:
+            return
+        priors = self._priors(game, moves)
+        self.first_child[node] = len(self.move)
+        self.n_children[node] = len(moves)
+        for i, move in enumerate(moves):
+            self.move.append(move)
+            self.parent.append(node)
+            self.first_child.append(0)
+            self.n_children.append(0)
+            if priors is None:
+                self.visits.append(0)
+                self.wins.append(0.0)
+            else:
+                self.visits.append(self.prior_visits)
+                self.wins.append(self.prior_visits * priors[i])
+
+    def _priors(self, game, moves):
+        """
+        :param game: the game object
+        :param moves: the moves of the current position
+        :return: the prior win rates of the moves for the current turn player according the prior heuristic, or None
+        """
+        if isinstance(self.prior_heuristic, ValueHeuristic):
+            player = game.player_turn
+            priors = []
+            for move in moves:
+                game.make_move(move)
+                J = self.prior_heuristic.compute(game) * player
+                game.unmake_move()
+                if math.isinf(J) or math.isnan(J):
+                    priors.append(1.0 if J > 0 else 0.0)
+                else:
+                    priors.append(1 / (1 + math.exp(-self.prior_scale * J)))
+            return priors
+        elif isinstance(self.prior_heuristic, OrderHeuristic):
+            # the prior goes linearly from 1 for the first move to 0 for the last one
+            ranks = {move: i for i, move in enumerate(self.prior_heuristic.sort(game, list(moves)))}
+            return [1 - ranks[move] / max(1, len(moves) - 1) for move in moves]
+        return None
+
+    def _playout(self, game):
+        """
+        Runs a playout: selects a leaf with UCT, expands it, fills the board at random and backs up the winner.
+        """
+        node = 0
+        path = [0]
+        players = [-game.player_turn]
+        winner = None
+        # selection
+        while self.n_children[node] > 0:
+            node = self._select(node)
+            players.append(game.player_turn)
+            game.make_move(self.move[node])
+            path.append(node)
+            winner = game.check_game()
+            if winner is not None:
+                break
+        # expansion
+        if winner is None and self.visits[node] > 0:
+            self._expand(node, game)
+        if winner is None and self.n_children[node] > 0:
+            node = self._select(node)
+            players.append(game.player_turn)
+            game.make_move(self.move[node])
+            path.append(node)
+            winner = game.check_game()
+        # simulation, the result is the fraction of wins of player 1
+        if winner is not None:
+            result = 1.0 if winner == 1 else 0.0
+        elif self.batch_size is not None:
+            winners, _, _ = batch_playouts(game, self.batch_size, self.rng)
+            result = float((winners == 1).mean())
+        else:
+            moves = game.available_moves()
+            self.random.shuffle(moves)
+            for move in moves:
+                game.make_move(move)
+            result = 1.0 if game.check_game() == 1 else 0.0
+            for _ in moves:
+                game.unmake_move()
+        # backpropagation
+        for node, player in zip(path, players):
+            self.visits[node] += 1
+            self.wins[node] += result if player == 1 else 1 - result
+        for _ in range(len(path) - 1):
+            game.unmake_move()
@@ -0,0 +1,221 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the opening book, its file format and its offline builder
+
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+
+import heuristics
+import hex_AI
+from hex import Hex, zobrist_tables
+
+# the book file starts with the magic, the board dimension and the number of slots,
+# then the slots of an open addressing table: the canonical key and the move r * n + c
+MAGIC = b'HEXBOOK1'
+HEADER = struct.Struct('<8sII')
+SLOT = struct.Struct('<QH')
+# the move of an empty slot
+EMPTY = 0xFFFF
+
+
+def book_path(n):
+    """
+    :param n: the dimension of the board
+    :return: the default path of the book of the board dimension
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books', 'hex' + str(n) + '.book')
+
+
+def symmetric_move(move, n, symmetry):
+    """
+    The symmetries of a Hex position are the 180 degrees rotation, which swaps the two edges of each player,
+    and the transposition with the colors of the stones and of the player in turn swapped, which swaps the edges
+    of the two players: a game started by the second player is the transposition of a game started by the first one.
+    Each symmetry is its own inverse.
+
+    :param move: a tuple of integers (r, c)
+    :param n: the dimension of the board
+    :param symmetry: 0 for the identity, 1 for the rotation, 2 for the transposition, 3 for both
+    :return: the move in the symmetric position
+    """
+    r, c = move
+    if symmetry & 2:
+        r, c = c, r
+    if symmetry & 1:
+        r, c = n - 1 - r, n - 1 - c
+    return r, c
+
+
+def canonical_key(game):
+    """
+    The symmetric positions are the same position for the players, so the book stores them once,
+    under the smallest of their keys.
+
+    :param game: the game object
+    :return: the canonical key and the symmetry (see symmetric_move) giving the canonical position
+    """
+    n = game.n
+    tables = zobrist_tables(n)
+    canonical = None
+    for symmetry in range(4):
+        # the transpositions swap the colors
+        color = -1 if symmetry & 2 else 1
+        key = tables['side'] if game.player_turn * color == -1 else 0
+        for r, c in game.history:
+            symmetric_r, symmetric_c = symmetric_move((r, c), n, symmetry)
+            key ^= tables[game.grid[r][c] * color][symmetric_r * n + symmetric_c]
+        if canonical is None or key < canonical[0]:
+            canonical = key, symmetry
+    return canonical
+
+
+class OpeningBook:
+    """
+    A read only opening book, a file memory mapped the first time a position is looked up.
+    Each lookup hashes the stones of the position under the four symmetries (see canonical_key), linear in the
+    length of the history, which is short in the opening, then probes a few slots of an open addressing table.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the path of the book file, it does not need to exist
+        """
+        self.path = path
+        self.loaded = False
+        self.mmap = None
+        self.n = None
+        self.n_slots = 0
+
+    def _load(self):
+        """
+        Maps the book file in memory, if it exists.
+        """
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, self.n_slots = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(self.path + ' is not an opening book')
+
+    def lookup(self, game):
+        """
+        :param game: the game object
+        :return: the book move of the current position, or None if it is not in the book
+        """
+        if not self.loaded:
+            self._load()
+        if self.mmap is None or self.n != game.n:
+            return None
+        key, symmetry = canonical_key(game)
+        slot = key % self.n_slots
+        while True:
+            stored_key, move = SLOT.unpack_from(self.mmap, HEADER.size + slot * SLOT.size)
+            if move == EMPTY:
+                return None
+            if stored_key == key:
+                return symmetric_move(divmod(move, game.n), game.n, symmetry)
+            slot = (slot + 1) % self.n_slots
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+
+def write_book(path, n, positions):
+    """
+    Writes a book file, with the table filled at most at half.
+
+    :param path: the path of the book file
+    :param n: the dimension of the board
+    :param positions: a dict from the canonical keys to the moves (in the canonical positions)
+    """
+    n_slots = max(1, 2 * len(positions))
+    slots = [(0, EMPTY)] * n_slots
+    for key, (r, c) in positions.items():
+        slot = key % n_slots
+        while slots[slot][1] != EMPTY:
+            slot = (slot + 1) % n_slots
+        slots[slot] = (key, r * n + c)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, n, n_slots))
+        for key, move in slots:
+            file.write(SLOT.pack(key, move))
+
+
+def build_book(path, config, moves=1, verbose=True, first_move=None):
+    """
+    Builds the book of a board dimension offline, searching the book move of the positions where the
+    computer plays its first moves: the empty board and every first move of the opponent,
+    then every opponent reply to the book moves, until moves book moves for each side.
+    The games started by the first player are enough, the symmetric positions (see canonical_key) cover
+    the games started by the second one.
+
+    :param path: the path of the book file
+    :param config: the game config of the search, with a deep max_depth or a Monte Carlo search with many playouts
+    :param moves: the number of book moves of each side
+    :param verbose: True to print the progress
+    :param first_move: the book move of the empty board (e.g. the center), or None to search it like the others
+    :return: the number of positions in the book
+    """
+    n = config['board_size']
+    positions = dict()
+    start_time = time.time()
+    # the positions to search, as move lists from the empty board
+    frontier = [[]] + [[(r, c)] for r in range(n) for c in range(n)]
+    for book_move in range(moves):
+        next_frontier = []
+        for i, history in enumerate(frontier):
+            game = Hex(n)
+            for move in history:
+                game.play_move(move)
+            key, symmetry = canonical_key(game)
+            if key in positions:
+                continue
+            if not history and first_move is not None:
+                move = first_move
+            else:
+                move = hex_AI.search_move(game, config)
+            positions[key] = symmetric_move(move, n, symmetry)
+            if verbose:
+                print('Book move', book_move, '- position', i + 1, '/', len(frontier), history, '->', move,
+                      round(time.time() - start_time, 1), 's')
+            # the opponent replies to the book move
+            if book_move + 1 < moves:
+                game.play_move(move)
+                if game.check_game() is None:
+                    next_frontier += [history + [move, reply] for reply in game.available_moves()]
+        frontier = next_frontier
+    write_book(path, n, positions)
+    return len(positions)
+
+
+# ============================================== BUILDER =====================================================
+
+
+if __name__ == "__main__":
+    # usage: python opening_book.py [board_size] [book moves] [max_depth]
+    board_size = int(sys.argv[1]) if len(sys.argv) > 1 else 11
+    book_moves = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    config = {
+        'board_size': board_size,
+        'max_depth': int(sys.argv[3]) if len(sys.argv) > 3 else 3,
+        'node_value_heuristic': heuristics.TwoDistanceValueHeuristic(),
+        'node_ordering_heuristic': heuristics.KillerHistoryOrderHeuristic(board_size,
+                                                                          heuristics.ChargeHeuristic(board_size)),
+        'reuse_search': True
+    }
+    print(build_book(book_path(board_size), config, book_moves), 'positions written to', book_path(board_size))
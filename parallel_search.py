@@ -0,0 +1,287 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the parallel version of the game search
+
+"""
+import math
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+import heuristics
+from search_common import SearchTimeout, store_position
+
+# the search state of a worker process, the heuristics are set once when the pool starts
+_worker = dict()
+
+
+def _init_worker(search, node_value_heuristic, node_ordering_heuristic, virtual_connections, inferior_cells,
+                 shared_bound, stop_event, root_name, root_size):
+    """
+    Initializes a worker process with its own copy of the heuristics.
+    """
+    _worker.update(search=search, node_value_heuristic=node_value_heuristic,
+                   node_ordering_heuristic=node_ordering_heuristic, virtual_connections=virtual_connections,
+                   inferior_cells=inferior_cells, shared_bound=shared_bound, stop_event=stop_event,
+                   root_name=root_name, root_size=root_size, search_id=None, game=None)
+
+
+def _search_root_move(search_id, move, maximize, depth, max_depth, window_bound, deadline):
+    """
+    Searches a root move in a worker, using the best value found so far by all the workers as bound.
+
+    :param search_id: the number of the search, whose root position is read once by each worker
+    :param move: the root move
+    :param maximize: True if the root player wants to maximize the minimax value
+    :param depth: the tree visit depth of the root
+    :param max_depth: the max depth to search until
+    :param window_bound: the bound of the root window the best value found so far does not change
+                         (beta for the maximizer, alpha for the minimizer)
+    :param deadline: the time.time() after which the search raises SearchTimeout, or None
+    :return: the move, its minimax value and True if the value is exact (else it is just a bound)
+    """
+    # a new search reads its root position from the shared memory block published by the pool
+    if search_id != _worker['search_id']:
+        block = shared_memory.SharedMemory(_worker['root_name'].value.decode())
+        try:
+            game = pickle.loads(bytes(block.buf[:_worker['root_size'].value]))
+        finally:
+            block.close()
+        # like in search_move, a root with fewer moves than the previous one starts a new game
+        if _worker['game'] is None or len(game.history) < len(_worker['game'].history):
+            _worker['node_ordering_heuristic'].new_game()
+        _worker.update(search_id=search_id, game=game)
+        _worker['node_ordering_heuristic'].new_search()
+    game = _worker['game']
+    shared_bound = _worker['shared_bound']
+    # the best value found so far is alpha for the maximizer and beta for the minimizer,
+    # the other bound of the window stays the one of the root
+    with shared_bound.get_lock():
+        bound = shared_bound.value
+    alpha, beta = (bound, window_bound) if maximize else (window_bound, bound)
+    n_moves = len(game.history)
+    game.make_move(move)
+    try:
+        value, _ = _worker['search'](game, not maximize, depth=depth + 1, max_depth=max_depth,
+                                     node_value_heuristic=_worker['node_value_heuristic'],
+                                     node_ordering_heuristic=_worker['node_ordering_heuristic'],
+                                     alpha=alpha, beta=beta, deadline=deadline,
+                                     stop_event=_worker['stop_event'],
+                                     virtual_connections=_worker['virtual_connections'],
+                                     inferior_cells=_worker['inferior_cells'])
+    finally:
+        # a stopped search leaves its moves on the board, the worker game is kept for the next tasks
+        while len(game.history) > n_moves:
+            game.unmake_move()
+    # shares the new best value
+    with shared_bound.get_lock():
+        if (maximize and value > shared_bound.value) or (not maximize and value < shared_bound.value):
+            shared_bound.value = value
+    return move, value, alpha < value < beta
+
+
+class SearchPool:
+    """
+    The worker processes of parallel_alpha_beta_pruning. The search function and the heuristics are sent
+    to each worker once, when the pool starts, so the pool is kept between the searches (the depths of
+    an iterative deepening and the moves of a game). The root position of each search is published once
+    in a shared memory block, whose name is shared like the best value, and a root move task only carries
+    the number of the search, the move and the window.
+    The workers have their own copies of the heuristics, whose state is not sent back.
+    """
+
+    def __init__(self, workers, search, node_value_heuristic, node_ordering_heuristic,
+                 virtual_connections=None, inferior_cells=None):
+        """
+        :param workers: the number of worker processes
+        :param search: the search function of the workers, alpha_beta_pruning or principal_variation_search
+        :param node_value_heuristic: the heuristic the workers evaluate the positions with
+        :param node_ordering_heuristic: the ordering heuristic of the workers
+        :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+        :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+        """
+        self.components = (workers, search, node_value_heuristic, node_ordering_heuristic,
+                           virtual_connections, inferior_cells)
+        # the best value found so far by the workers and the event stopping them
+        self.shared_bound = multiprocessing.Value('d', 0.0)
+        self.stop_event = multiprocessing.Event()
+        # the shared memory block of the root position of the current search, its name and its size
+        self.root = None
+        self.root_name = multiprocessing.Array('c', 64)
+        self.root_size = multiprocessing.Value('i', 0)
+        self.search_id = 0
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(search, node_value_heuristic, node_ordering_heuristic,
+                                                      virtual_connections, inferior_cells,
+                                                      self.shared_bound, self.stop_event,
+                                                      self.root_name, self.root_size))
+
+    def matches(self, workers, search, node_value_heuristic, node_ordering_heuristic,
+                virtual_connections=None, inferior_cells=None):
+        """
+        :return: True if the pool was started with the same number of workers, search function and heuristics
+        """
+        return all(a is b for a, b in zip(self.components, (workers, search, node_value_heuristic,
+                                                             node_ordering_heuristic, virtual_connections,
+                                                             inferior_cells)))
+
+    def publish(self, game):
+        """
+        Publishes the root position of a new search for the workers.
+
+        :param game: the game object
+        :return: the number of the search
+        """
+        self.release()
+        root = pickle.dumps(game)
+        self.root = shared_memory.SharedMemory(create=True, size=len(root))
+        self.root.buf[:len(root)] = root
+        self.root_name.value = self.root.name.encode()
+        self.root_size.value = len(root)
+        self.search_id += 1
+        return self.search_id
+
+    def release(self):
+        """
+        Frees the shared memory block of the last search, its workers must have ended.
+        """
+        if self.root is not None:
+            self.root.close()
+            self.root.unlink()
+            self.root = None
+
+    def shutdown(self):
+        """
+        Stops the workers, the searches in progress end at their next node.
+        """
+        self.stop_event.set()
+        self.executor.shutdown(cancel_futures=True)
+        self.release()
+
+
+def parallel_alpha_beta_pruning(game, maximize, depth=0, max_depth=math.inf,
+                                node_value_heuristic=heuristics.ShortestPathValueHeuristic,
+                                node_ordering_heuristic=heuristics.RandomOrderHeuristic,
+                                alpha=-float('inf'),
+                                beta=float('inf'),
+                                transposition_table=None,
+                                deadline=None,
+                                stop_event=None,
+                                virtual_connections=None,
+                                inferior_cells=None,
+                                stats=None,
+                                pool=None):
+    """
+    The a-b pruning algorithm with the root moves split on a pool of processes.
+    The first root move is searched alone (young brothers wait) to get a bound, then the other
+    root moves are searched by the workers, each one starting from the best value found so far.
+    The heuristics are sent to each worker once, when the pool starts, the position once for each search.
+    It takes the same parameters of alpha_beta_pruning, the transposition table is only used at the root,
+    and the pool whose workers search the root moves: they use the search function and the heuristics the
+    pool was started with, the ones given here are used for the first root move.
+
+    :param game: the game object
+    :param maximize: True if first player wants to maximize the minimax value
+    :param depth: the current tree visit depth
+    :param max_depth: the max depth to search until
+    :param node_value_heuristic: the heuristic the algorithm will use to evaluate a position
+    :param node_ordering_heuristic: an orderding heuristic on the positions
+    :param alpha: the current alpha value
+    :param beta: the current beta value
+    :param transposition_table: a TranspositionTable to order the root moves and store the result, or None
+    :param deadline: the time.time() after which the search raises SearchTimeout, or None
+    :param stop_event: a threading.Event which stops the search raising SearchTimeout when set, or None
+    :param virtual_connections: a hsearch.HSearch to stop at the proven wins and to restrict the moves, or None
+    :param inferior_cells: an inferior.InferiorCells to skip the dead and captured cells, or None
+    :param stats: a search_stats.SearchStats collecting the statistics of the search in this process, or None
+    :param pool: the SearchPool of the workers
+    :return: the current minimax value and the best move to execute
+    """
+    if pool is None:
+        raise ValueError('parallel_alpha_beta_pruning needs a SearchPool')
+    search = pool.components[1]
+    winner = game.check_game()
+    # if position is terminal (the game is ended) or max search depth reached
+    # return the position value and no move can be done
+    if winner is not None:
+        return winner * float('inf'), None
+    elif depth >= max_depth:
+        return node_value_heuristic.compute(game), None
+    original_alpha, original_beta = alpha, beta
+    # compute and sort legal moves, the stored best move is searched first
+    available_moves = game.available_moves()
+    if virtual_connections is not None:
+        _, must_play = virtual_connections.analyze(game)
+        if must_play is not None:
+            available_moves = [move for move in available_moves if must_play >> move[0] * game.n + move[1] & 1]
+    if inferior_cells is not None:
+        _, inferior = inferior_cells.analyze(game)
+        available_moves = [move for move in available_moves if not inferior >> move[0] * game.n + move[1] & 1] \
+            or available_moves[:1]
+    available_moves = node_ordering_heuristic.sort(game, available_moves)
+    if transposition_table is not None:
+        entry = transposition_table.lookup(game.zobrist_key)
+        if entry is not None and entry[3] in available_moves:
+            available_moves.remove(entry[3])
+            available_moves.insert(0, entry[3])
+    # the eldest brother is searched first
+    game.make_move(available_moves[0])
+    curr_minimax_value, _ = search(game, not maximize, depth=depth + 1, max_depth=max_depth,
+                                   node_value_heuristic=node_value_heuristic,
+                                   node_ordering_heuristic=node_ordering_heuristic,
+                                   alpha=alpha, beta=beta, transposition_table=transposition_table,
+                                   deadline=deadline, stop_event=stop_event,
+                                   virtual_connections=virtual_connections, inferior_cells=inferior_cells,
+                                   stats=stats)
+    game.unmake_move()
+    best_move = available_moves[0]
+    best_is_exact = alpha < curr_minimax_value < beta
+    if maximize:
+        alpha = max(alpha, curr_minimax_value)
+    else:
+        beta = min(beta, curr_minimax_value)
+    if beta > alpha and len(available_moves) > 1:
+        with pool.shared_bound.get_lock():
+            pool.shared_bound.value = alpha if maximize else beta
+        pool.stop_event.clear()
+        search_id = pool.publish(game)
+        futures = {pool.executor.submit(_search_root_move, search_id, move, maximize, depth, max_depth,
+                                        beta if maximize else alpha, deadline): i
+                   for i, move in enumerate(available_moves[1:])}
+        try:
+            pending = set(futures)
+            results = []
+            while pending:
+                # the stop event is a threading.Event the workers can't see, it is checked while waiting them
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                if stop_event is not None and stop_event.is_set():
+                    raise SearchTimeout()
+                for future in done:
+                    move, value, is_exact = future.result()
+                    results.append((futures[future], move, value, is_exact))
+                    # cutoff, the other moves are not needed
+                    if (maximize and value >= beta) or (not maximize and value <= alpha):
+                        pending = set()
+        finally:
+            # the searches in progress are stopped (they end at their next node) and the others are cancelled,
+            # so the pool is free for the next search
+            pool.stop_event.set()
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            pool.release()
+        # the best move, with the exact values preferred to the bounds and the ordering to break the ties
+        for _, move, value, is_exact in sorted(results):
+            if (maximize and value > curr_minimax_value) or (not maximize and value < curr_minimax_value) or \
+                    (value == curr_minimax_value and is_exact and not best_is_exact):
+                curr_minimax_value, best_move, best_is_exact = value, move, is_exact
+    if transposition_table is not None:
+        store_position(transposition_table, game, max_depth - depth, curr_minimax_value, best_move,
+                       original_alpha, original_beta)
+    return curr_minimax_value, best_move
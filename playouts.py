@@ -0,0 +1,71 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the vectorized random playouts
+
+"""
+import numpy as np
+
+
+def batch_playouts(game, k, rng=None):
+    """
+    Runs k random playouts at once from the current position of game: the empty cells of k copies
+    of the board are filled with random permutations of the remaining stones of the two players.
+
+    :param game: the game object
+    :param k: the number of playouts
+    :param rng: a numpy random Generator, or None
+    :return: the winners (an array of k values 1 or -1), the ownership map (the average owner of each cell)
+             and the win correlation map (the covariance between the owner of each cell and the winner)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    n = game.n
+    grid = np.array(game.grid, dtype=np.int8).ravel()
+    winner = game.check_game()
+    if winner is not None:
+        ownership = grid.reshape(n, n).astype(float)
+        return np.full(k, winner, dtype=np.int8), ownership, np.zeros((n, n))
+    empty = np.flatnonzero(grid == 0)
+    # the current turn player gets the extra stone if the empty cells are odd
+    stones = np.full(len(empty), -game.player_turn, dtype=np.int8)
+    stones[:(len(empty) + 1) // 2] = game.player_turn
+    boards = np.repeat(grid[np.newaxis, :], k, axis=0)
+    boards[:, empty] = stones[rng.random((k, len(empty))).argsort(axis=1)]
+    boards = boards.reshape(k, n, n)
+    winners = batch_winners(boards)
+    ownership = boards.mean(axis=0)
+    win_correlation = (boards * winners[:, np.newaxis, np.newaxis]).mean(axis=0) - ownership * winners.mean()
+    return winners, ownership, win_correlation
+
+
+def batch_winners(boards):
+    """
+    Finds the winners of full boards, propagating from the left edge the cells reached by player 1:
+    on a full board either player 1 connects the left and right edges or player -1 wins.
+
+    :param boards: an array (k, n, n) of full boards
+    :return: an array of k values 1 or -1
+    """
+    stones = boards == 1
+    reached = np.zeros_like(stones)
+    reached[:, :, 0] = stones[:, :, 0]
+    while True:
+        spread = reached.copy()
+        # each cell gets the reached state of its six adjacent cells
+        spread[:, 1:, :] |= reached[:, :-1, :]
+        spread[:, :-1, :] |= reached[:, 1:, :]
+        spread[:, :, 1:] |= reached[:, :, :-1]
+        spread[:, :, :-1] |= reached[:, :, 1:]
+        spread[:, 1:, :-1] |= reached[:, :-1, 1:]
+        spread[:, :-1, 1:] |= reached[:, 1:, :-1]
+        spread &= stones
+        if np.array_equal(spread, reached):
+            break
+        reached = spread
+    return np.where(reached[:, :, -1].any(axis=1), 1, -1).astype(np.int8)
@@ -0,0 +1,147 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the in process solver of the Hex resistor networks
+
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import splu
+
+# the topologies already built for each board size
+_topologies = dict()
+
+
+def topology(n):
+    """
+    :param n: the dimension of the board
+    :return: a dict with the two ends of each link between adjacent cells (numbered r * n + c, each link once)
+             and, for each player, the cells of its first and of its second edge
+    """
+    if n not in _topologies:
+        first, second = [], []
+        for r in range(n):
+            for c in range(n):
+                for dr, dc in [(0, -1), (1, -1), (1, 0)]:
+                    if 0 <= r + dr < n and 0 <= c + dc < n:
+                        first.append(r * n + c)
+                        second.append((r + dr) * n + c + dc)
+        _topologies[n] = {'links': (np.array(first, dtype=int), np.array(second, dtype=int)),
+                          1: (np.arange(0, n * n, n), np.arange(n - 1, n * n, n)),
+                          -1: (np.arange(n), np.arange(n * (n - 1), n * n))}
+    return _topologies[n]
+
+
+class ResistanceSolver:
+    """
+    Solves the resistor network of a player, the same circuit of heuristics.ResistanceValueHeuristic:
+    a 1 ohm resistor links two adjacent cells not of the opponent, unless they are both of the player
+    (0 ohm), and the cells of the two edges of the player are shorted to the two terminals.
+    The nodes linked by 0 ohm are merged, then the conductance Laplacian of the merged nodes reachable
+    from the second terminal (the ground) is factorized with a sparse LU and solved for a 1 A current
+    injected in the first terminal: its potential is the equivalent resistance.
+    The solutions are kept by position in a LRU cache, so the heuristics sharing the solver
+    (the value and the ordering ones) solve each network once.
+    """
+
+    def __init__(self, max_entries=4096):
+        """
+        :param max_entries: the max number of solutions kept
+        """
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        # the statistics of the solver
+        self.hits = 0
+        self.misses = 0
+
+    def solve(self, game, player):
+        """
+        :param game: the game object
+        :param player: 1 or -1
+        :return: the equivalent resistance between the edges of player (inf if they are not connected,
+                 0 if they are shorted) and the potential of each cell (numbered r * n + c, the first edge
+                 is at the resistance and the second one at 0, nan for the cells outside the circuit)
+        """
+        key = (game.n, game.zobrist_key, player)
+        solution = self.cache.pop(key, None)
+        if solution is None:
+            self.misses += 1
+            solution = self._solve(np.array(game.grid, dtype=np.int8).ravel(), game.n, player)
+            while len(self.cache) >= self.max_entries:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+        self.cache[key] = solution
+        return solution
+
+    @staticmethod
+    def _solve(cells, n, player):
+        """
+        :param cells: the state of each cell
+        :param n: the dimension of the board
+        :param player: 1 or -1
+        :return: the equivalent resistance and the potentials of the cells (see solve)
+        """
+        board = topology(n)
+        first, second = board['links']
+        first_edge, second_edge = board[player]
+        # the two terminals are the nodes n * n and n * n + 1
+        n_nodes = n * n + 2
+        first_terminal, second_terminal = n * n, n * n + 1
+        valid = (cells[first] != -player) & (cells[second] != -player)
+        shorted = valid & (cells[first] == player) & (cells[second] == player)
+        # the nodes linked by 0 ohm (the groups of stones and the edges with their terminals) are merged
+        ends_a = np.concatenate([first[shorted], first_edge, second_edge])
+        ends_b = np.concatenate([second[shorted], np.full(n, first_terminal), np.full(n, second_terminal)])
+        n_merged, merged = csgraph.connected_components(
+            sparse.csr_matrix((np.ones(len(ends_a)), (ends_a, ends_b)), shape=(n_nodes, n_nodes)), directed=False)
+        source, ground = merged[first_terminal], merged[second_terminal]
+        potentials = np.full(n * n, math.nan)
+        if source == ground:
+            potentials[(merged[:n * n] == source) & (cells != -player)] = 0.0
+            return 0.0, potentials
+        # the 1 ohm resistors between different merged nodes
+        ends_a, ends_b = merged[first[valid & ~shorted]], merged[second[valid & ~shorted]]
+        resistors = ends_a != ends_b
+        ends_a, ends_b = ends_a[resistors], ends_b[resistors]
+        # the circuit is the part connected to the ground
+        _, circuit = csgraph.connected_components(
+            sparse.csr_matrix((np.ones(len(ends_a)), (ends_a, ends_b)), shape=(n_merged, n_merged)), directed=False)
+        if circuit[source] != circuit[ground]:
+            return math.inf, potentials
+        in_circuit = circuit[ends_a] == circuit[ground]
+        ends_a, ends_b = ends_a[in_circuit], ends_b[in_circuit]
+        # the nodes of the circuit but the ground, whose potential is 0, are the rows of the Laplacian
+        nodes = np.flatnonzero(circuit == circuit[ground])
+        nodes = nodes[nodes != ground]
+        row = np.full(n_merged, len(nodes))
+        row[nodes] = np.arange(len(nodes))
+        rows_a, rows_b = row[ends_a], row[ends_b]
+        # the parallel resistors are summed when the matrix is converted, the links to the ground only count
+        # in the diagonal
+        grounded = (ends_a == ground) | (ends_b == ground)
+        degrees = np.bincount(np.concatenate([rows_a, rows_b]), minlength=len(nodes) + 1)[:len(nodes)]
+        links_a, links_b = rows_a[~grounded], rows_b[~grounded]
+        laplacian = sparse.csc_matrix((np.concatenate([degrees, -np.ones(2 * len(links_a))]),
+                                       (np.concatenate([np.arange(len(nodes)), links_a, links_b]),
+                                        np.concatenate([np.arange(len(nodes)), links_b, links_a]))),
+                                      shape=(len(nodes), len(nodes)))
+        current = np.zeros(len(nodes))
+        current[row[source]] = 1.0
+        solution = splu(laplacian).solve(current)
+        merged_potentials = np.full(n_merged, math.nan)
+        merged_potentials[ground] = 0.0
+        merged_potentials[nodes] = solution
+        potentials = merged_potentials[merged[:n * n]]
+        # the opponent cells of the edges are shorted to the terminals, but they are not in the circuit
+        potentials[cells == -player] = math.nan
+        return float(merged_potentials[source]), potentials
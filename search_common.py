@@ -0,0 +1,68 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the helpers shared by the serial and the parallel game search
+
+"""
+from transposition import EXACT, LOWER, UPPER
+
+
+class SearchTimeout(Exception):
+    """
+    Raised by the search when its deadline has passed or when it is stopped.
+    """
+    pass
+
+
+def lookup_position(transposition_table, game, depth_left, alpha, beta):
+    """
+    Looks up the current position in the transposition table.
+
+    :param transposition_table: the TranspositionTable
+    :param game: the game object
+    :param depth_left: the depth the position has to be searched with
+    :param alpha: the current alpha value
+    :param beta: the current beta value
+    :return: the stored value if it is enough to return from the node (else None),
+             alpha and beta narrowed by the stored bound and the stored best move (or None)
+    """
+    entry = transposition_table.lookup(game.zobrist_key)
+    if entry is None:
+        return None, alpha, beta, None
+    value, entry_depth, flag, hash_move = entry
+    if entry_depth >= depth_left:
+        if flag == EXACT:
+            return value, alpha, beta, hash_move
+        elif flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if beta <= alpha:
+            return value, alpha, beta, hash_move
+    return None, alpha, beta, hash_move
+
+
+def store_position(transposition_table, game, depth_left, value, move, alpha, beta):
+    """
+    Stores the search result of the current position in the transposition table.
+
+    :param transposition_table: the TranspositionTable
+    :param game: the game object
+    :param depth_left: the depth the position was searched with
+    :param value: the minimax value found
+    :param move: the best move found
+    :param alpha: the alpha value the position was searched with
+    :param beta: the beta value the position was searched with
+    """
+    if value <= alpha:
+        flag = UPPER
+    elif value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    transposition_table.store(game.zobrist_key, value, depth_left, flag, move)
@@ -0,0 +1,150 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the statistics collector of the game search
+
+"""
+import json
+import time
+
+
+class SearchStats:
+    """
+    Collects the statistics of the searches, one record per move: the nodes per depth, the leaf evaluations,
+    the time spent in the value and ordering heuristics, the position of the moves causing the cutoffs,
+    the effective branching factor, the transposition table hit rate and the hit rate of a cached value heuristic.
+    It is passed to the search as stats, when the search has no stats it just checks for None.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: if not None, the file each move record is appended to, as a JSON line
+        """
+        self.path = path
+        # the records of the moves searched so far
+        self.moves = []
+        self._clear()
+
+    def _clear(self):
+        """
+        Resets the counters of the current move.
+        """
+        self.start_time = time.time()
+        self.nodes = []
+        self.evaluations = 0
+        self.evaluation_time = 0.0
+        # the evaluations answered by a heuristic cache (heuristics.CachedValueHeuristic)
+        self.cached_evaluations = 0
+        self.cache_hits = 0
+        self.sorts = 0
+        self.sort_time = 0.0
+        # for each move index the number of cutoffs it caused
+        self.cutoffs = []
+        self.transposition_table = None
+        self.table_probes = (0, 0)
+
+    def start_move(self, game, transposition_table=None):
+        """
+        Starts the record of a new move.
+
+        :param game: the game object
+        :param transposition_table: the TranspositionTable used by the search, or None
+        """
+        self._clear()
+        self.ply = len(game.history)
+        self.player = game.player_turn
+        self.transposition_table = transposition_table
+        if transposition_table is not None:
+            self.table_probes = (transposition_table.hits, transposition_table.misses)
+
+    def node(self, depth):
+        """
+        Counts a node visited at depth.
+        """
+        while len(self.nodes) <= depth:
+            self.nodes.append(0)
+        self.nodes[depth] += 1
+
+    def evaluate(self, node_value_heuristic, game):
+        """
+        :return: the value of the position according node_value_heuristic, timing it
+        """
+        hits = getattr(node_value_heuristic, 'hits', None)
+        start_time = time.perf_counter()
+        J = node_value_heuristic.compute(game)
+        self.evaluation_time += time.perf_counter() - start_time
+        self.evaluations += 1
+        if hits is not None:
+            self.cached_evaluations += 1
+            self.cache_hits += node_value_heuristic.hits - hits
+        return J
+
+    def sort(self, node_ordering_heuristic, game, available_moves):
+        """
+        :return: the moves sorted according node_ordering_heuristic, timing it
+        """
+        start_time = time.perf_counter()
+        available_moves = node_ordering_heuristic.sort(game, available_moves)
+        self.sort_time += time.perf_counter() - start_time
+        self.sorts += 1
+        return available_moves
+
+    def cutoff(self, index):
+        """
+        Counts a cutoff caused by the move of position index in the sorted moves.
+        """
+        while len(self.cutoffs) <= index:
+            self.cutoffs.append(0)
+        self.cutoffs[index] += 1
+
+    def end_move(self, move, depth=None):
+        """
+        Closes the record of the current move.
+
+        :param move: the move found
+        :param depth: the depth reached, if known
+        :return: the record of the move
+        """
+        lasted_time = time.time() - self.start_time
+        nodes = sum(self.nodes)
+        max_depth = len(self.nodes) - 1
+        record = {'ply': self.ply, 'player': self.player, 'move': list(move) if move is not None else None,
+                  'depth': depth if depth is not None else max_depth, 'time': lasted_time, 'nodes': nodes,
+                  'nodes_per_second': nodes / lasted_time if lasted_time > 0 else 0.0,
+                  'nodes_per_depth': list(self.nodes),
+                  'evaluations': self.evaluations, 'evaluation_time': self.evaluation_time,
+                  'sorts': self.sorts, 'sort_time': self.sort_time,
+                  'cutoffs': sum(self.cutoffs),
+                  'first_move_cutoff_rate': self.cutoffs[0] / sum(self.cutoffs) if self.cutoffs else 0.0,
+                  'cutoffs_per_move_index': list(self.cutoffs),
+                  # the branching factor of a uniform tree with the same nodes and depth
+                  'effective_branching_factor': nodes ** (1 / max_depth) if max_depth > 0 else 0.0}
+        if self.cached_evaluations:
+            record['evaluation_cache_hit_rate'] = self.cache_hits / self.cached_evaluations
+        if self.transposition_table is not None:
+            hits = self.transposition_table.hits - self.table_probes[0]
+            misses = self.transposition_table.misses - self.table_probes[1]
+            record['table_hit_rate'] = hits / (hits + misses) if hits + misses else 0.0
+        self.moves.append(record)
+        if self.path is not None:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(record) + '\n')
+        return record
+
+    def to_json(self):
+        """
+        :return: the records of the moves as JSON
+        """
+        return json.dumps(self.moves, indent=1)
+
+    def export(self, path):
+        """
+        Writes the records of the moves as JSON to path.
+        """
+        with open(path, 'w') as file:
+            file.write(self.to_json())
@@ -0,0 +1,115 @@
+"""
+==========================================================
+            Intelligent Agents: Final project
+                    A.A. 2022-2023
+----------------------------------------------------------
+                   Luigi Schiavone
+=========================================================
+
+FILE: this file contains the transposition table used by the game search
+
+"""
+
+# the bound types of a stored value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    """
+    A bounded transposition table indexed by the Zobrist key of the positions.
+    Each slot stores the key, the value, the remaining search depth, the bound type
+    and the best move, in parallel lists. When two positions fall in the same slot
+    the one searched deeper is kept (depth-preferred replacement).
+    The table can be kept between the searches of consecutive moves: each entry also stores
+    the search (generation) it was written in, and the entries of the older searches are always replaced.
+    """
+
+    # the estimated memory taken by an entry: the slot pointers of the parallel lists
+    # plus the key and value objects (the moves are shared with the game)
+    ENTRY_BYTES = 128
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        """
+        :param max_bytes: the memory cap of the table
+        """
+        # the number of slots is the largest power of 2 that fits the memory cap
+        n_slots = 1
+        while n_slots * 2 * self.ENTRY_BYTES <= max_bytes:
+            n_slots *= 2
+        self.mask = n_slots - 1
+        self.keys = [None] * n_slots
+        self.values = [0] * n_slots
+        self.depths = [0] * n_slots
+        self.flags = [EXACT] * n_slots
+        self.moves = [None] * n_slots
+        self.generations = [0] * n_slots
+        self.generation = 0
+        # the statistics of the table
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.keys) - self.keys.count(None)
+
+    def lookup(self, key):
+        """
+        :param key: the Zobrist key of a position
+        :return: a tuple (value, depth, flag, move) if the position is stored, else None
+        """
+        slot = key & self.mask
+        stored_key = self.keys[slot]
+        if stored_key == key:
+            self.hits += 1
+            return self.values[slot], self.depths[slot], self.flags[slot], self.moves[slot]
+        # the slot is taken by another position
+        if stored_key is not None:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth, flag, move):
+        """
+        Stores a search result, unless its slot holds a different position searched deeper in the current search.
+
+        :param key: the Zobrist key of the position
+        :param value: the minimax value found
+        :param depth: the remaining depth the position was searched with
+        :param flag: EXACT, LOWER (value is a lower bound) or UPPER (value is an upper bound)
+        :param move: the best move found
+        """
+        slot = key & self.mask
+        if self.keys[slot] is not None and self.keys[slot] != key and self.depths[slot] > depth \
+                and self.generations[slot] == self.generation:
+            return
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.generations[slot] = self.generation
+        self.stores += 1
+
+    def new_search(self):
+        """
+        Starts a new search: the entries stored so far are kept, but they become stale
+        and are replaced by any entry of the new search.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """
+        Removes all the entries and resets the statistics.
+        """
+        self.__init__((self.mask + 1) * self.ENTRY_BYTES)
+
+    def stats(self):
+        """
+        :return: a dict with the statistics of the table
+        """
+        probes = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'collisions': self.collisions, 'stores': self.stores,
+                'hit_rate': self.hits / probes if probes else 0.0}
@@ -217,7 +217,7 @@ class UI:
         text_rect.x = 15
         text_rect.y = 400
         self.screen.blit(text, text_rect)
-        text = pygame.font.SysFont("avenir", 12, True).render(config['AI1_node_value_heuristic'].__class__.__name__, True, self.white)
+        text = pygame.font.SysFont("avenir", 12, True).render(getattr(config['AI1_node_value_heuristic'], 'heuristic', config['AI1_node_value_heuristic']).__class__.__name__, True, self.white)
         text_rect = text.get_rect()
         text_rect.x = 15
         text_rect.y = 418
@@ -320,7 +320,7 @@ class UI:
         text_rect = text.get_rect()
         text_rect.topright = (195 + x_offset, 360 + y_offset)
         self.screen.blit(text, text_rect)
-        text = pygame.font.SysFont("avenir", 12, True).render(config['AI2_node_value_heuristic'].__class__.__name__, True, self.white)
+        text = pygame.font.SysFont("avenir", 12, True).render(getattr(config['AI2_node_value_heuristic'], 'heuristic', config['AI2_node_value_heuristic']).__class__.__name__, True, self.white)
         text_rect = text.get_rect()
         text_rect.topright = (195 + x_offset, 380 + y_offset)
         self.screen.blit(text, text_rect)